@@ -8,6 +8,8 @@ import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import requests
 import seaborn as sns
+from utils.dataset_registry import current_datasets
+from utils.profiling import start_page_profile, finish_page_profile, profiled
 
 # ------------------------- #
 # ⚙️ Streamlit Page Configuration
@@ -18,10 +20,17 @@ st.set_page_config(
     layout="wide"
 )
 
+# 🐞 Opt-in profiling of this rerun (?profile=1 or PHONEPE_PROFILE=1)
+profiler = start_page_profile("Device_Dashboard", __file__)
+
 # ------------------------- #
 # 📥 Load Data
 # ------------------------- #
-device_df = pd.read_csv('device_usage.csv')
+datasets = current_datasets()
+device_df = datasets.frame('device_usage.csv')
+
+# Dense [state, brand, period] arrays built once per dataset version and shared by every chart below
+device_cube = datasets.derived['device_cube']
 
 # ------------------------- #
 # 🏷️ Page Title
@@ -72,12 +81,12 @@ if __name__ == "__main__":
 # ------------------------- #
 # 📊 Function: Max Registered Users by Brand and State
 # ------------------------- #
+@profiled()
 def max_device_state(device_df):
     st.subheader('📊 Max Registered Users by Brand in Each State and Year')
 
-    # Get index of row with maximum users per state and year
-    idx = device_df.groupby(['state_name', 'trans_year'])['reg_user'].idxmax()
-    max_user_device = device_df.loc[idx].sort_values(by='reg_user', ascending=False)
+    # Row with maximum users per state and year, answered from the device cube
+    max_user_device = device_cube.top_brand_per_state_year('reg_user').sort_values(by='reg_user', ascending=False)
 
     # Display the max user device data
     st.dataframe(max_user_device, use_container_width=True)
@@ -103,6 +112,7 @@ max_use_device = max_device_state(device_df)
 # ------------------------- #
 # 📶 Function: Device Count per State for Selected Brands
 # ------------------------- #
+@profiled()
 def mobile_wise_data(device_df):
     # 📱 Sidebar filter for brand selection
     mobile_category = st.sidebar.multiselect("Select Brand(s) for Device Usage", device_df['brand'].unique())
@@ -111,10 +121,8 @@ def mobile_wise_data(device_df):
         st.warning("Please select at least one brand.")
         return pd.DataFrame()
 
-    # 🎯 Filter and aggregate by state
-    filtered_df = device_df[device_df['brand'].isin(mobile_category)]
-    total_users = filtered_df.groupby('state_name')['reg_user'].sum()
-    result = total_users.reset_index().sort_values(by='reg_user', ascending=False)
+    # 🎯 Sum registered users per state over the selected brands
+    result = device_cube.state_totals('reg_user', brands=mobile_category)
 
     return result
 
@@ -138,6 +146,7 @@ st.pyplot(fig)
 # ------------------------- #
 # 🌐 Function: Brand Distribution for Selected State(s)
 # ------------------------- #
+@profiled()
 def state_wise_data(device_df):
     # Sidebar Filter for states
     state_name_data = st.sidebar.multiselect("Select State(s) to View Brand Share", device_df['state_name'].unique())
@@ -146,10 +155,8 @@ def state_wise_data(device_df):
         st.warning("Please select at least one state.")
         return pd.DataFrame()
 
-    # Filter and aggregate
-    filtered_df = device_df[device_df['state_name'].isin(state_name_data)]
-    mobile_data = filtered_df.groupby('brand')['count'].sum()
-    result = mobile_data.reset_index().sort_values(by='count', ascending=False)
+    # Sum device counts per brand over the selected states
+    result = device_cube.brand_totals('count', states=state_name_data)
 
     return result
 
@@ -177,3 +184,6 @@ fig.update_layout(
 )
 
 st.plotly_chart(fig)
+
+# 🐞 Profiler debug panel (only rendered when profiling is on)
+finish_page_profile(profiler)
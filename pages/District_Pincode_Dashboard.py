@@ -1,13 +1,47 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from utils.streaming import group_sum
+from utils.disk_cache import disk_cached
+from utils.dataset_registry import current_datasets
+from utils.anomaly import score_table, flag_anomalies
+from utils.profiling import start_page_profile, finish_page_profile, profiled
 
 # Page configuration
 st.set_page_config(page_title="PhonePe Analytics Dashboard", page_icon="📊", layout="wide")
 
-# Load data
-district_df = pd.read_csv("district_data.csv")
-pincode_df = pd.read_csv("pincode_data.csv")
+# 🐞 Opt-in profiling of this rerun (?profile=1 or PHONEPE_PROFILE=1)
+profiler = start_page_profile("District_Pincode_Dashboard", __file__)
+
+# Load data (in streaming mode these are ChunkedCsv readers and every section below works from chunks)
+datasets = current_datasets()
+district_df = datasets.table("district_data.csv")
+pincode_df = datasets.table("pincode_data.csv")
+streaming = datasets.streamed("district_data.csv")
+
+# Dataset versions key the on-disk result cache, so refreshed CSVs never hit stale entries
+district_version = datasets.versions["district_data.csv"]
+pincode_version = datasets.versions["pincode_data.csv"]
+
+# 🎛️ Sorted choices for the Year / Quarter / State filters
+@profiled()
+@disk_cached(datasets.version)
+def filter_options(df):
+    columns = ['trans_year', 'quarter', 'state_name']
+    if streaming:
+        combos = df.sum(columns, 'transaction_count').index
+        return {c: sorted(combos.unique(level=c)) for c in columns}
+    return {c: sorted(df[c].unique()) for c in columns}
+
+# Rows matching the selected filters
+def filter_rows(df, years, quarters, states):
+    if streaming:
+        return df.filter(trans_year=years, quarter=quarters, state_name=states)
+    return df[
+        (df['trans_year'].isin(years)) &
+        (df['quarter'].isin(quarters)) &
+        (df['state_name'].isin(states))
+    ]
 
 # Title
 st.title("📱 PhonePe Dashboard: Decoding Transaction Dynamics")
@@ -17,16 +51,13 @@ st.caption("Visualizing transaction trends, growth patterns, and user engagement
 # SECTION: District-Level Dashboard
 # ------------------------------------------
 st.sidebar.header("🔎 District-Level Filters")
-trans_year = st.sidebar.multiselect("📆 Select Year(s)", sorted(district_df['trans_year'].unique()), key='district_year')
-quarter = st.sidebar.multiselect("🗓️ Select Quarter(s)", sorted(district_df['quarter'].unique()), key='district_quarter')
-state_name = st.sidebar.multiselect("🏙️ Select State(s)", sorted(district_df['state_name'].unique()), key='district_state')
+district_options = filter_options(district_df)
+trans_year = st.sidebar.multiselect("📆 Select Year(s)", district_options['trans_year'], key='district_year')
+quarter = st.sidebar.multiselect("🗓️ Select Quarter(s)", district_options['quarter'], key='district_quarter')
+state_name = st.sidebar.multiselect("🏙️ Select State(s)", district_options['state_name'], key='district_state')
 
 if trans_year and quarter and state_name:
-    filter_df = district_df[
-        (district_df['trans_year'].isin(trans_year)) &
-        (district_df['quarter'].isin(quarter)) &
-        (district_df['state_name'].isin(state_name))
-    ]
+    filter_df = filter_rows(district_df, trans_year, quarter, state_name)
 
     st.subheader("📄 Filtered District-Level Transaction Data")
     st.dataframe(filter_df, use_container_width=True)
@@ -49,8 +80,14 @@ else:
     st.warning("⚠️ Please select Year, Quarter, and State to view district-level data.")
 
 # Function to find district with max transaction per state
+@profiled()
+@disk_cached(district_version)
 def max_transaction_district(df):
-    grouped = df.groupby(['state_name', 'district'])['transaction_amount'].sum().reset_index()
+    if streaming:
+        # Sum in bounded-size chunks straight from the CSV; only per-district totals stay in memory
+        grouped = df.sum(['state_name', 'district'], 'transaction_amount').reset_index()
+    else:
+        grouped = df.groupby(['state_name', 'district'])['transaction_amount'].sum().reset_index()
     max_trans_df = grouped.loc[grouped.groupby('state_name')['transaction_amount'].idxmax()].reset_index(drop=True)
     return max_trans_df.sort_values(by='transaction_amount', ascending=False)
 
@@ -73,7 +110,10 @@ st.plotly_chart(fig2, use_container_width=True)
 
 # Yearly trend by state
 st.subheader("📈 Yearly Transaction Trend by State")
-yearly_trend = district_df.groupby(['trans_year', 'state_name'])['transaction_amount'].sum().reset_index()
+if streaming:
+    yearly_trend = district_df.sum(['trans_year', 'state_name'], 'transaction_amount').reset_index()
+else:
+    yearly_trend = district_df.groupby(['trans_year', 'state_name'])['transaction_amount'].sum().reset_index()
 fig3 = px.line(
     yearly_trend,
     x='trans_year',
@@ -83,37 +123,41 @@ fig3 = px.line(
 )
 st.plotly_chart(fig3, use_container_width=True)
 
-df_heatmap = pd.pivot_table(
-    pincode_df,
-    values='transaction_count',
-    index='state_name',
-    columns='trans_year',
-    aggfunc='sum'
-)
+@profiled()
+@disk_cached(pincode_version)
+def yearly_heatmap_figure(df):
+    if streaming:
+        df_heatmap = df.sum(['state_name', 'trans_year'], 'transaction_count').unstack('trans_year')
+    else:
+        df_heatmap = pd.pivot_table(
+            df,
+            values='transaction_count',
+            index='state_name',
+            columns='trans_year',
+            aggfunc='sum'
+        )
 
-fig_heatmap = px.imshow(
-    df_heatmap,
-    labels=dict(x="Year", y="State", color="Transaction count"),
-    title="Heatmap: Yearly Transactions by State",
-    aspect="auto",
-    color_continuous_scale="Viridis"
-)
+    return px.imshow(
+        df_heatmap,
+        labels=dict(x="Year", y="State", color="Transaction count"),
+        title="Heatmap: Yearly Transactions by State",
+        aspect="auto",
+        color_continuous_scale="Viridis"
+    )
 
+fig_heatmap = yearly_heatmap_figure(pincode_df)
 st.plotly_chart(fig_heatmap, use_container_width=True)
 # ------------------------------------------
 # SECTION: Pincode-Level Dashboard
 # ------------------------------------------
 st.sidebar.header("🔎 Pincode-Level Filters")
-trans_year1 = st.sidebar.multiselect("📆 Select Year(s)", sorted(pincode_df['trans_year'].unique()), key='pincode_year')
-quarter1 = st.sidebar.multiselect("🗓️ Select Quarter(s)", sorted(pincode_df['quarter'].unique()), key='pincode_quarter')
-state_name1 = st.sidebar.multiselect("🏙️ Select State(s)", sorted(pincode_df['state_name'].unique()), key='pincode_state')
+pincode_options = filter_options(pincode_df)
+trans_year1 = st.sidebar.multiselect("📆 Select Year(s)", pincode_options['trans_year'], key='pincode_year')
+quarter1 = st.sidebar.multiselect("🗓️ Select Quarter(s)", pincode_options['quarter'], key='pincode_quarter')
+state_name1 = st.sidebar.multiselect("🏙️ Select State(s)", pincode_options['state_name'], key='pincode_state')
 
 if trans_year1 and quarter1 and state_name1:
-    filter_df_pin = pincode_df[
-        (pincode_df['trans_year'].isin(trans_year1)) &
-        (pincode_df['quarter'].isin(quarter1)) &
-        (pincode_df['state_name'].isin(state_name1))
-    ]
+    filter_df_pin = filter_rows(pincode_df, trans_year1, quarter1, state_name1)
 
     st.subheader("📄 Filtered Pincode-Level Transaction Data")
     st.dataframe(filter_df_pin, use_container_width=True)
@@ -121,10 +165,76 @@ if trans_year1 and quarter1 and state_name1:
 else:
     st.warning("⚠️ Please select Year, Quarter, and State to view pincode-level data.")
 
-pincode_df['pincode'] =pincode_df['pincode'].astype(str)
+# ------------------------------------------
+# SECTION: Pincode Drill-down (Zone → Sub-zone → Sorting District → Pincode)
+# ------------------------------------------
+st.subheader("🧭 Pincode Drill-down: Zone → Sub-zone → Sorting District → Pincode")
+pincode_index = datasets.derived['pincode_index']
+
+def prefix_selectbox(label, options, key):
+    return st.selectbox(label, ['All'] + [str(p) for p in options], key=key)
+
+drill_prefix = None
+drill_table = pincode_index.children()
+drill_level = 'Zone'
+col_zone, col_sub, col_sort = st.columns(3)
+
+with col_zone:
+    zone = prefix_selectbox("📮 Zone (1st digit)", drill_table['prefix'], 'drill_zone')
+if zone != 'All':
+    drill_prefix, drill_level = int(zone), 'Sub-zone'
+    drill_table = pincode_index.children(drill_prefix)
+    with col_sub:
+        sub_zone = prefix_selectbox("📬 Sub-zone (2 digits)", drill_table['prefix'], 'drill_sub_zone')
+    if sub_zone != 'All':
+        drill_prefix, drill_level = int(sub_zone), 'Sorting District'
+        drill_table = pincode_index.children(drill_prefix)
+        with col_sort:
+            sorting = prefix_selectbox("📦 Sorting District (3 digits)", drill_table['prefix'], 'drill_sorting')
+        if sorting != 'All':
+            drill_prefix, drill_level = int(sorting), 'Pincode'
+            drill_table = pincode_index.children(drill_prefix)
+
+if drill_prefix is not None:
+    drill_total = pincode_index.total(drill_prefix)
+    st.caption(
+        f"Prefix {drill_prefix}: {drill_total['transaction_count']:,} transactions "
+        f"across {drill_total['pincodes']} pincodes"
+    )
+
+drill_table = drill_table.rename(columns={'prefix': drill_level})
+drill_table[drill_level] = drill_table[drill_level].astype(str)
+with st.expander("🔍 View Table To See Data"):
+    st.dataframe(drill_table, use_container_width=True)
 
+fig_drill = px.bar(
+    drill_table,
+    x=drill_level,
+    y='transaction_count',
+    hover_data=['transaction_amount', 'pincodes'],
+    title=f'Transaction Count by {drill_level}',
+    labels={'transaction_count': 'Transaction Count'}
+)
+st.plotly_chart(fig_drill, use_container_width=True)
+
+if not streaming:
+    pincode_df['pincode'] =pincode_df['pincode'].astype(str)
+
+# 🌊 Pincode chunks with pincode as a string, like the in-memory frame above
+def pincode_str_chunks(df, usecols, valid_only=False):
+    for chunk in df.chunks(usecols=usecols):
+        if valid_only:
+            chunk = chunk[chunk['pincode'].notna()]
+        yield chunk.assign(pincode=chunk['pincode'].astype(str))
+
+@profiled()
+@disk_cached(pincode_version)
 def max_transaction_pincode(df):
-    grouped = df.groupby(['state_name', 'pincode'])['transaction_count'].sum().reset_index()
+    if streaming:
+        chunks = pincode_str_chunks(df, ['state_name', 'pincode', 'transaction_count'])
+        grouped = group_sum(chunks, ['state_name', 'pincode'], 'transaction_count').reset_index()
+    else:
+        grouped = df.groupby(['state_name', 'pincode'])['transaction_count'].sum().reset_index()
     max_trans_df = grouped.loc[grouped.groupby('state_name')['transaction_count'].idxmax()].reset_index(drop=True)
     return max_trans_df.sort_values(by='transaction_count', ascending=False)
 
@@ -147,7 +257,11 @@ st.plotly_chart(fig5, use_container_width=True)
 
 # Yearly trend by state
 st.subheader("📈 Yearly Transaction Trend by State")
-yearly_trend = pincode_df.groupby(['trans_year', 'state_name','pincode'])['transaction_count'].sum().reset_index()
+if streaming:
+    chunks = pincode_str_chunks(pincode_df, ['state_name', 'pincode', 'transaction_count', 'trans_year'])
+    yearly_trend = group_sum(chunks, ['trans_year', 'state_name', 'pincode'], 'transaction_count').reset_index()
+else:
+    yearly_trend = pincode_df.groupby(['trans_year', 'state_name','pincode'])['transaction_count'].sum().reset_index()
 fig4 = px.line(
     yearly_trend,
     x='trans_year',
@@ -157,3 +271,68 @@ fig4 = px.line(
 )
 st.plotly_chart(fig4, use_container_width=True)
 
+
+# ------------------------------------------
+# SECTION: Anomalous Quarters (Spikes & Drops)
+# ------------------------------------------
+st.subheader("🚨 Unusual Spikes and Drops by Quarter")
+st.caption("Every district / pincode series is scored against the trend of its previous quarters (robust z-score after removing seasonality).")
+
+col_level, col_metric, col_threshold = st.columns(3)
+with col_level:
+    anomaly_level = st.radio("📍 Series Level", ['District', 'Pincode'], horizontal=True, key='anomaly_level')
+with col_metric:
+    anomaly_metric = st.radio("📏 Metric", ['transaction_count', 'transaction_amount'], horizontal=True, key='anomaly_metric')
+with col_threshold:
+    anomaly_threshold = st.slider("🎚️ Z-score Threshold", 2.0, 10.0, 3.5, 0.5, key='anomaly_threshold')
+
+# Scores are cached per (level, metric); moving the threshold slider only re-filters them
+@profiled()
+@disk_cached(district_version)
+def district_scores(df, metric):
+    keys = ['state_name', 'district']
+    if streaming:
+        # Per-quarter totals are all the scoring needs
+        df = df.sum(keys + ['trans_year', 'quarter'], metric).reset_index()
+    return score_table(df, keys, metric)
+
+@profiled()
+@disk_cached(pincode_version)
+def pincode_scores(df, metric):
+    keys = ['state_name', 'pincode']
+    if streaming:
+        chunks = pincode_str_chunks(df, keys + ['trans_year', 'quarter', metric], valid_only=True)
+        df = group_sum(chunks, keys + ['trans_year', 'quarter'], metric).reset_index()
+    else:
+        df = df[df['pincode'].notna() & (df['pincode'] != 'nan')]
+    return score_table(df, keys, metric)
+
+if anomaly_level == 'District':
+    anomaly_scores = district_scores(district_df, anomaly_metric)
+    series_col = 'district'
+else:
+    anomaly_scores = pincode_scores(pincode_df, anomaly_metric)
+    series_col = 'pincode'
+anomalies = flag_anomalies(anomaly_scores, anomaly_threshold)
+
+st.caption(f"{len(anomalies):,} unusual quarters found at |z| ≥ {anomaly_threshold}")
+with st.expander("🔍 View Table To See Data"):
+    st.dataframe(anomalies, use_container_width=True)
+
+anomalies = anomalies.assign(
+    Year_Quarter=anomalies['trans_year'].astype(str) + " Q" + anomalies['quarter'].astype(str)
+).sort_values(by=['trans_year', 'quarter'])
+fig_anomaly = px.scatter(
+    anomalies,
+    x='Year_Quarter',
+    y='zscore',
+    color='direction',
+    hover_data=['state_name', series_col, anomaly_metric],
+    title=f'Unusual {anomaly_level} Quarters ({anomaly_metric})',
+    labels={'zscore': 'Robust Z-score', 'Year_Quarter': 'Time'},
+    color_discrete_map={'SPIKE': 'green', 'DROP': 'red'}
+)
+st.plotly_chart(fig_anomaly, use_container_width=True)
+
+# 🐞 Profiler debug panel (only rendered when profiling is on)
+finish_page_profile(profiler)
@@ -5,6 +5,9 @@ import plotly.express as px
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import requests
+from utils.dataset_registry import current_datasets
+from utils.joins import national_quarter_metrics
+from utils.profiling import start_page_profile, finish_page_profile, profiled
 
 # 🌐 App Configuration
 st.set_page_config(
@@ -13,8 +16,15 @@ st.set_page_config(
     layout="wide"
 )
 
+# 🐞 Opt-in profiling of this rerun (?profile=1 or PHONEPE_PROFILE=1)
+profiler = start_page_profile("Dynamics_Dashboard", __file__)
+
 # 📄 Load Transaction Data
-agg_df = pd.read_csv('agg_trans_detail.csv')
+datasets = current_datasets()
+agg_df = datasets.frame('agg_trans_detail.csv')
+
+# Transactions joined with users and devices on normalized (state, year, quarter), built once per dataset version
+state_quarter_df = datasets.derived['state_quarter']
 
 # 📋 Utility Function to Display Tables
 def display_table(data):
@@ -45,6 +55,7 @@ if __name__ == "__main__":
     main()
 
 # 📊 Function to Classify States by Transaction Volume
+@profiled()
 def overall_growth(agg_df):
     category = st.sidebar.multiselect("Select Transaction Mode for State Classification", agg_df['mode_of_trans'].unique())
 
@@ -152,8 +163,8 @@ st.plotly_chart(fig, use_container_width=True)
 # 📈 Line Chart for User Growth Over Time
 st.subheader("📈 Registered User Growth Over Time")
 
-user_growth = agg_df.groupby(['trans_year', 'quarter'])['reg_user'].sum().reset_index()
-user_growth['Year_Quarter'] = user_growth['trans_year'].astype(str) + " Q" + user_growth['quarter'].astype(str)
+# Registered users come from user_data.csv via the prebuilt state × quarter join
+user_growth = national_quarter_metrics(state_quarter_df)
 
 fig_line = px.line(
     user_growth.sort_values(by=['trans_year', 'quarter']),
@@ -165,3 +176,39 @@ fig_line = px.line(
 )
 
 st.plotly_chart(fig_line, use_container_width=True)
+
+# 💡 Per-User Transaction Metrics
+st.subheader("💡 Per-User Transaction Metrics")
+
+per_user_metrics = {
+    'trans_per_user': 'Transactions per Registered User',
+    'avg_ticket_size': 'Average Ticket Size (₹)',
+    'opens_per_user': 'App Opens per Registered User',
+}
+metric = st.selectbox("📏 Select Metric", list(per_user_metrics), format_func=per_user_metrics.get)
+metric_states = st.multiselect("🏙️ Compare State(s)", sorted(state_quarter_df['state_name'].unique()))
+
+if metric_states:
+    metric_df = state_quarter_df[state_quarter_df['state_name'].isin(metric_states)].copy()
+    metric_df['Year_Quarter'] = metric_df['trans_year'].astype(str) + " Q" + metric_df['quarter'].astype(str)
+    color = 'state_name'
+else:
+    metric_df = user_growth.assign(state_name='India')
+    color = None
+
+fig_metric = px.line(
+    metric_df.sort_values(by=['trans_year', 'quarter']),
+    x='Year_Quarter',
+    y=metric,
+    color=color,
+    title=f"{per_user_metrics[metric]} (Quarter-wise)",
+    labels={metric: per_user_metrics[metric], 'Year_Quarter': 'Time', 'state_name': 'State'},
+    markers=True
+)
+st.plotly_chart(fig_metric, use_container_width=True)
+
+with st.expander("🔍 View Table To See Data"):
+    st.dataframe(metric_df, use_container_width=True)
+
+# 🐞 Profiler debug panel (only rendered when profiling is on)
+finish_page_profile(profiler)
@@ -3,44 +3,72 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import matplotlib.pyplot as plt
+from utils.streaming import group_argmax, group_argmin, stream_potential
+from utils.disk_cache import disk_cached
+from utils.dataset_registry import current_datasets
+from utils.forecast import fit_district_forecast, backtest_forecast
+from utils.profiling import start_page_profile, finish_page_profile, profiled
 
 # 🛠️ Streamlit page configuration
 st.set_page_config(page_title="PhonePe", page_icon="🧊", layout="wide")
 
-# 📥 Load the dataset
-pt_df = pd.read_csv("phonepe_trasaction.csv")
+# 🐞 Opt-in profiling of this rerun (?profile=1 or PHONEPE_PROFILE=1)
+profiler = start_page_profile("Transaction_Dashboard", __file__)
+
+# 📥 Load the dataset (a ChunkedCsv reader in streaming mode; every section below works from chunks)
+datasets = current_datasets()
+pt_df = datasets.table("phonepe_trasaction.csv")
+streaming = datasets.streamed("phonepe_trasaction.csv")
+pt_version = datasets.versions["phonepe_trasaction.csv"]
 
 # 🧾 Utility function to display a DataFrame
 def disply_table(data):
     st.dataframe(data, use_container_width=True)
 
+# 🎛️ Filter choices in order of first appearance, and the default state (the one on row 1)
+@profiled()
+@disk_cached(pt_version)
+def filter_options(pt_df):
+    columns = ['trans_year', 'quarter', 'state_name']
+    if streaming:
+        options = {c: pt_df.unique(c) for c in columns}
+        options['default_state'] = pt_df.head(2)['state_name'][1]
+    else:
+        options = {c: pt_df[c].unique() for c in columns}
+        options['default_state'] = pt_df['state_name'][1]
+    return options
+
 # 🧠 Main filter UI
 def main():
     st.title("**Transaction Analysis for Strategic Market Expansion**")
 
     # Sidebar filters: Year, Quarter, and State
+    options = filter_options(pt_df)
     year = st.sidebar.multiselect(
         'Select Year',
-        pt_df['trans_year'].unique(),
+        options['trans_year'],
         default=[2019]
     )
     quarter = st.sidebar.multiselect(
         'Select Quarter',
-        pt_df['quarter'].unique(),
+        options['quarter'],
         default=[1]
     )
     state_name = st.sidebar.multiselect(
         'Select State Name',
-        pt_df['state_name'].unique(),
-        default=pt_df['state_name'][1]
+        options['state_name'],
+        default=options['default_state']
     )
 
     # Filter data based on sidebar selections
-    pt_df_select = pt_df[
-        pt_df['trans_year'].isin(year) &
-        pt_df['quarter'].isin(quarter) &
-        pt_df['state_name'].isin(state_name)
-    ]
+    if streaming:
+        pt_df_select = pt_df.filter(trans_year=year, quarter=quarter, state_name=state_name)
+    else:
+        pt_df_select = pt_df[
+            pt_df['trans_year'].isin(year) &
+            pt_df['quarter'].isin(quarter) &
+            pt_df['state_name'].isin(state_name)
+        ]
 
     # Display filtered data
     disply_table(pt_df_select)
@@ -50,9 +78,20 @@ def main():
 if __name__ == "__main__":
     main()
 
+# 🌊 Transaction CSV in bounded-size chunks, with year / quarter as strings like the in-memory path
+def year_quarter_chunks(pt_df):
+    for chunk in pt_df.chunks():
+        yield chunk.assign(trans_year=chunk['trans_year'].astype(str), quarter=chunk['quarter'].astype(str))
+
 # 📊 Max transaction per year-quarter across all states
+@profiled()
 def max_trans_every_year_quarter(pt_df):
     st.title("📈 Maximum Transaction per Quarter and Year (by District)")
+
+    if streaming:
+        # Chunked path: only the current best row per year-quarter is held in memory
+        max_trans = group_argmax(year_quarter_chunks(pt_df), ['trans_year', 'quarter'], 'transaction_count')
+        return max_trans.sort_values(by=['trans_year', 'quarter'])
     
     pt_df['trans_year'] = pt_df['trans_year'].astype(str)
     pt_df['quarter'] = pt_df['quarter'].astype(str)
@@ -85,8 +124,13 @@ fig1.update_layout(
 st.plotly_chart(fig1)
 
 # 📉 Minimum transaction per year-quarter across all states
+@profiled()
 def min_trans_every_year_quarter(pt_df):
     st.title("📉 Minimum Transaction per Quarter and Year (by District)")
+
+    if streaming:
+        min_trans = group_argmin(year_quarter_chunks(pt_df), ['trans_year', 'quarter'], 'transaction_count')
+        return min_trans.sort_values(by=['trans_year', 'quarter'])
     
     pt_df['trans_year'] = pt_df['trans_year'].astype(str)
     pt_df['quarter'] = pt_df['quarter'].astype(str)
@@ -118,7 +162,17 @@ fig2 = px.scatter(
 st.plotly_chart(fig2, use_container_width=True)
 
 # 🔍 Classify districts based on transaction potential
+@profiled()
+@disk_cached(pt_version)
 def pontential_area(pt_df):
+    if streaming:
+        # Chunked path: only per-district totals are held in memory
+        chunks = (
+            chunk.assign(transaction_count=pd.to_numeric(chunk['transaction_count'], errors='coerce'))
+            for chunk in pt_df.chunks(usecols=['state_name', 'district', 'transaction_count'])
+        )
+        return stream_potential(chunks, ['state_name', 'district'], 'transaction_count', labels=('HIGH', 'PONTENTIAL', 'LOW'))
+
     pt_df['transaction_count'] = pd.to_numeric(pt_df['transaction_count'], errors='coerce')
 
     # Total transactions by district
@@ -143,6 +197,43 @@ def pontential_area(pt_df):
 
 find_potential = pontential_area(pt_df)
 
+# 🔮 Next-quarter forecast for every district (one batched fit, cached per dataset version)
+def quarterly_totals(pt_df):
+    # The fit only needs per-district quarterly totals, which streaming mode sums in chunks
+    if streaming:
+        return pt_df.sum(['state_name', 'district', 'trans_year', 'quarter'], 'transaction_count').reset_index()
+    return pt_df
+
+@profiled()
+@disk_cached(pt_version)
+def district_forecast(pt_df):
+    return fit_district_forecast(quarterly_totals(pt_df), value='transaction_count')
+
+# ✅ Replay the forecast on the last 4 known quarters before trusting it
+@profiled()
+@disk_cached(pt_version)
+def district_forecast_backtest(pt_df):
+    return backtest_forecast(quarterly_totals(pt_df), value='transaction_count')
+
+forecast_df = district_forecast(pt_df)
+backtest_df = district_forecast_backtest(pt_df)
+next_label = f"{forecast_df['next_year'].iloc[0]} Q{forecast_df['next_quarter'].iloc[0]}"
+forecast_mape = backtest_df['forecast_mape'].mean()
+naive_mape = backtest_df['naive_mape'].mean()
+# Only show the forecast when it beats simply repeating last quarter
+forecast_valid = forecast_mape < naive_mape
+forecast_caption = (
+    f"Forecast backtest over the last {len(backtest_df)} quarters: average error {forecast_mape:.1%} "
+    f"vs {naive_mape:.1%} for repeating the previous quarter. "
+    f"New districts have too little history to forecast, and districts not reported last quarter get no forecast."
+)
+if forecast_valid:
+    find_potential = find_potential.merge(
+        forecast_df[['state_name', 'district', 'forecast']],
+        on=['state_name', 'district'],
+        how='left'
+    )
+
 # 🎯 State-wise potential area selection
 state_potential = st.sidebar.multiselect(
     'Select State(s) to View District Potential',
@@ -169,9 +260,30 @@ if not find_tential.empty:
             labels={'transaction_count': 'Transaction Count', 'district': 'District'},
             color_discrete_map={'HIGH': 'green', 'PONTENTIAL': 'orange', 'LOW': 'red'}
         )
+
         fig.update_layout(xaxis_tickangle=-45)
+        if forecast_valid:
+            # Forecast overlay on a secondary axis: bars are all-time totals, the forecast is one quarter
+            fig.add_scatter(
+                x=state_df['district'],
+                y=state_df['forecast'],
+                mode='markers',
+                marker=dict(symbol='diamond', size=10, color='black'),
+                name=f'Forecast {next_label}',
+                yaxis='y2'
+            )
+            fig.update_layout(
+                yaxis2=dict(title=f'Forecast Transactions ({next_label})', overlaying='y', side='right', showgrid=False)
+            )
         st.plotly_chart(fig, use_container_width=True)
+        if forecast_valid:
+            st.caption(forecast_caption)
+        else:
+            st.caption(f"{next_label} forecast hidden. {forecast_caption}")
 else:
     st.info("Please select at least one state to display potential chart.")
 
 st.write('---')
+
+# 🐞 Profiler debug panel (only rendered when profiling is on)
+finish_page_profile(profiler)
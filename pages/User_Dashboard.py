@@ -4,12 +4,17 @@ import plotly.express as px
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import requests
+from utils.dataset_registry import current_datasets
+from utils.profiling import start_page_profile, finish_page_profile, profiled
 
 # Page config
 st.set_page_config(page_title="PhonePe Analytics Dashboard", page_icon="📗", layout="wide")
 
+# 🐞 Opt-in profiling of this rerun (?profile=1 or PHONEPE_PROFILE=1)
+profiler = start_page_profile("User_Dashboard", __file__)
+
 # Load data
-user_df = pd.read_csv('user_data.csv')
+user_df = current_datasets().frame('user_data.csv')
 
 # -------------------- Display Helper --------------------
 def disply_table(data):
@@ -43,6 +48,7 @@ def main():
     st.write('---')
 
 # -------------------- MAX USER PER QUARTER --------------------
+@profiled()
 def max_user_every_year_quarter(df):
     st.subheader("🚀 Top Performing States by Quarter & Year (Maximum Registered Users)")
 
@@ -71,6 +77,7 @@ def max_user_every_year_quarter(df):
     st.plotly_chart(fig, use_container_width=True)
 
 # -------------------- MIN USER PER QUARTER --------------------
+@profiled()
 def min_user_every_year_quarter(df):
     st.subheader("📉 Least Performing States by Quarter & Year (Minimum Registered Users)")
 
@@ -100,6 +107,7 @@ def min_user_every_year_quarter(df):
     st.plotly_chart(fig, use_container_width=True)
 
 # -------------------- USER GROWTH LINE CHART --------------------
+@profiled()
 def user_growth_over_time(df):
     st.subheader("📊 Year-wise Growth of Registered Users (2018–2024)")
 
@@ -122,6 +130,7 @@ def user_growth_over_time(df):
         st.dataframe(growth_df, use_container_width=True)
 
 # -------------------- POTENTIAL AREA --------------------
+@profiled()
 def potential_area(df):
     st.subheader("📍 Potential Business Areas Based on App Engagement")
 
@@ -149,6 +158,7 @@ def potential_area(df):
     return grouped
 
 # -------------------- CHOROPLETH --------------------
+@profiled()
 def plot_choropleth(classified_df):
     st.subheader("🗺️ App Engagement Level by State (Choropleth Map)")
 
@@ -198,3 +208,6 @@ if __name__ == "__main__":
     user_growth_over_time(user_df)
     classified_df = potential_area(user_df)
     plot_choropleth(classified_df)
+
+# 🐞 Profiler debug panel (only rendered when profiling is on)
+finish_page_profile(profiler)
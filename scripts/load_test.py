@@ -0,0 +1,259 @@
+# ------------------------- #
+# 🏋️ Concurrent-Session Load Test
+# ------------------------- #
+# Simulates N analysts at once: every session visits every selected
+# dashboard page with Streamlit's AppTest harness (each session starts on a
+# different page) and drives a random sequence of filter changes
+# (multiselects, selectboxes, radios, sliders) on each, timing each rerun.
+# Every concurrency level therefore runs the same mix of pages, and the
+# report shows percentiles per page as well as overall.
+#
+# AppTest was built for single-session tests: sessions sharing one process
+# lose each other's widget state (KeyError('$$ID-...')). By default every
+# session therefore runs in its own process (--isolation process); the
+# processes share the on-disk result cache like the workers of a
+# multi-process deployment, and the reported RSS is their total. With
+# --isolation thread the sessions share one process like the sessions of
+# one Streamlit server, but a level with any harness error is reported as
+# invalid. Failed reruns are never counted in latency or throughput.
+#
+# Usage:
+#     python scripts/load_test.py --concurrency 1 2 4 8 --steps 5
+#     python scripts/load_test.py --pages Device_Dashboard --csv results.csv
+import argparse
+import csv
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import psutil
+from streamlit import config as st_config
+from streamlit import logger as st_logger
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(ROOT, 'pages')
+sys.path.insert(0, ROOT)
+
+# Widget-state lookups AppTest loses when sessions share a process: KeyError('$$ID-<hash>-<key>')
+HARNESS_ERROR = re.compile(r'\$\$ID-')
+
+
+def error_kind(error):
+    if not error:
+        return ''
+    return 'harness' if HARNESS_ERROR.search(error) else 'page'
+
+
+# ------------------------- #
+# 🎲 Realistic Filter Changes
+# ------------------------- #
+def widgets(at):
+    return list(at.multiselect) + list(at.selectbox) + list(at.radio) + list(at.slider)
+
+
+def random_interaction(at, rng):
+    """Change one random filter the way an analyst would; returns a short description."""
+    candidates = [w for w in widgets(at) if getattr(w, 'options', True)]
+    if not candidates:
+        return None
+    widget = rng.choice(candidates)
+
+    if widget.type == 'multiselect':
+        picks = rng.sample(widget.options, k=rng.randint(1, min(3, len(widget.options))))
+        widget.set_value(picks)
+    elif widget.type in ('selectbox', 'radio'):
+        widget.set_value(rng.choice(widget.options))
+    elif widget.type == 'slider':
+        proto = widget.proto
+        steps = int((proto.max - proto.min) / proto.step) if proto.step else 0
+        widget.set_value(type(widget.value)(proto.min + proto.step * rng.randint(0, steps)))
+    return f'{widget.type}:{widget.label}'
+
+
+# ------------------------- #
+# 👤 One Simulated Session
+# ------------------------- #
+def run_session(pages, steps, timeout, seed):
+    """Visit every page (starting at a seed-dependent one) with `steps` filter changes each."""
+    rng = random.Random(seed)
+    records = []
+    for offset in range(len(pages)):
+        page = pages[(seed + offset) % len(pages)]
+        at = AppTest.from_file(os.path.join(PAGES_DIR, f'{page}.py'), default_timeout=timeout)
+
+        for step in range(steps + 1):
+            action = 'open' if step == 0 else random_interaction(at, rng)
+            if action is None:
+                break
+            start = time.perf_counter()
+            try:
+                at.run()
+                error = str(at.exception[0].message) if len(at.exception) else ''
+            except Exception as e:  # timeouts and script errors count as failed reruns
+                error = repr(e)
+            records.append({
+                'page': page,
+                'action': action,
+                'latency_ms': (time.perf_counter() - start) * 1000,
+                'error': error,
+                'error_kind': error_kind(error),
+            })
+    return records
+
+
+def init_worker():
+    # Each isolated session loads the data before its first timed rerun, like a warm worker
+    st_config.set_option('logger.level', 'error')
+    st_logger.set_log_level('error')
+    from utils.dataset_registry import get_registry
+    get_registry()
+
+
+# ------------------------- #
+# 📈 Memory Sampler
+# ------------------------- #
+class RssSampler(threading.Thread):
+    def __init__(self, interval=0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = self.process.memory_info().rss
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, self.total_rss())
+
+    def total_rss(self):
+        # This process plus the isolated session processes
+        total = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass  # exited between listing and sampling
+        return total
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+def run_level(pages, concurrency, steps, timeout, seed, isolation):
+    sampler = RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    if isolation == 'process':
+        # One fresh process per session
+        pool = ProcessPoolExecutor(max_workers=concurrency, max_tasks_per_child=1, initializer=init_worker)
+    else:
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+    with pool:
+        futures = [pool.submit(run_session, pages, steps, timeout, seed + i) for i in range(concurrency)]
+        records = [r for f in futures for r in f.result()]
+    elapsed = time.perf_counter() - start
+    peak_rss = sampler.stop()
+
+    summary = summarize(records, elapsed)
+    harness_errors = summary['harness_errors']
+    summary.update({
+        'concurrency': concurrency,
+        'valid': 'no' if harness_errors else 'yes',
+        'peak_rss_mb': peak_rss / 1024 / 1024,
+    })
+    by_page = []
+    for page in pages:
+        page_summary = summarize([r for r in records if r['page'] == page], elapsed)
+        by_page.append(dict(page_summary, concurrency=concurrency, page=page))
+    return summary, by_page, records
+
+
+def summarize(records, elapsed):
+    """Rerun counts, and latency / throughput over the successful reruns only."""
+    ok = np.array([r['latency_ms'] for r in records if not r['error']])
+    percentile = lambda q: np.percentile(ok, q) if len(ok) else np.nan
+    return {
+        'reruns': len(records),
+        'errors': sum(1 for r in records if r['error_kind'] == 'page'),
+        'harness_errors': sum(1 for r in records if r['error_kind'] == 'harness'),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'reruns_per_s': len(ok) / elapsed,
+    }
+
+
+def print_table(rows, columns):
+    cell = lambda value: f'{value:.1f}' if isinstance(value, float) else str(value)
+    widths = {c: max([14, len(c)] + [len(cell(row[c])) for row in rows]) for c in columns}
+    print(' '.join(f'{c:>{widths[c]}}' for c in columns))
+    for row in rows:
+        print(' '.join(f'{cell(row[c]):>{widths[c]}}' for c in columns))
+
+
+def main():
+    all_pages = sorted(f[:-3] for f in os.listdir(PAGES_DIR) if f.endswith('.py'))
+    parser = argparse.ArgumentParser(description="Load-test the dashboard pages with concurrent simulated sessions")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--steps', type=int, default=5, help="filter changes per session after opening the page")
+    parser.add_argument('--pages', nargs='+', default=all_pages, choices=all_pages)
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'data'), help="directory holding the CSV files")
+    parser.add_argument('--timeout', type=float, default=120, help="seconds allowed per rerun")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', help="write every rerun's latency to this CSV file")
+    parser.add_argument(
+        '--isolation', choices=['process', 'thread'], default='process',
+        help="one process per session (default), or all sessions as threads of one process like one server"
+    )
+    args = parser.parse_args()
+
+    # Keep per-rerun deprecation warnings from drowning the report
+    st_logger.set_log_level('error')
+
+    csv_path = os.path.abspath(args.csv) if args.csv else None
+    # The pages read their CSVs relative to the working directory
+    os.chdir(args.data_dir)
+
+    summaries, by_page, all_records = [], [], []
+    for level in args.concurrency:
+        summary, page_summaries, records = run_level(
+            args.pages, level, args.steps, args.timeout, args.seed, args.isolation
+        )
+        summaries.append(summary)
+        by_page += page_summaries
+        all_records += [dict(r, concurrency=level) for r in records]
+
+    print_table(summaries, [
+        'concurrency', 'valid', 'reruns', 'errors', 'harness_errors', 'p50_ms', 'p95_ms', 'p99_ms',
+        'reruns_per_s', 'peak_rss_mb'
+    ])
+    print()
+    print_table(by_page, ['concurrency', 'page', 'reruns', 'errors', 'harness_errors', 'p50_ms', 'p95_ms', 'p99_ms'])
+    if any(s['valid'] == 'no' for s in summaries):
+        print("\n❌ Levels marked valid=no had AppTest harness errors; their numbers are not a measurement. "
+              "Rerun with --isolation process.")
+
+    errors = sorted({(r['error_kind'], r['page'], r['error']) for r in all_records if r['error']})
+    for kind, page, error in errors:
+        if kind == 'page':
+            print(f'⚠️ {page}: {error}')
+    for kind, page, error in errors:
+        if kind == 'harness':
+            print(f'🧪 {page} (AppTest widget state, not a page error): {error}')
+
+    if csv_path:
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['concurrency', 'page', 'action', 'latency_ms', 'error', 'error_kind'])
+            writer.writeheader()
+            writer.writerows(all_records)
+
+
+if __name__ == "__main__":
+    main()
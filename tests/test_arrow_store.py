@@ -0,0 +1,24 @@
+import os
+
+import pandas as pd
+
+from utils import arrow_store
+from utils.arrow_store import ARROW_DIR_ENV, export_arrow, load_csv
+
+
+def test_stale_file_is_not_mapped_when_replace_fails(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'counts.csv'
+    pd.DataFrame({'count': [1, 2]}).to_csv(csv_path, index=False)
+    monkeypatch.setenv(ARROW_DIR_ENV, str(tmp_path / 'arrow'))
+    export_arrow(csv_path)
+
+    # New version of the CSV while another worker keeps the old Arrow file open
+    pd.DataFrame({'count': [1, 2, 3]}).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(0, 0))
+
+    def locked(src, dst):
+        raise PermissionError('file is mapped by another process')
+    monkeypatch.setattr(arrow_store.os, 'replace', locked)
+
+    assert load_csv(csv_path)['count'].tolist() == [1, 2, 3]
+    assert not list((tmp_path / 'arrow').glob('*.tmp'))
@@ -0,0 +1,102 @@
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+from utils import dataset_registry
+from utils.dataset_registry import DATASETS, DatasetRegistry, SnapshotError
+
+
+@pytest.fixture
+def registry(data_dir, tmp_path):
+    for name in DATASETS:
+        shutil.copy(os.path.join(data_dir, name), tmp_path / name)
+    return DatasetRegistry(str(tmp_path), interval=0, snapshot_dir=tmp_path / 'snapshots')
+
+
+def rewrite(registry, name, edit):
+    path = os.path.join(registry.data_dir, name)
+    with open(path) as f:
+        text = f.read()
+    with open(path, 'w') as f:
+        f.write(edit(text))
+
+
+def test_non_numeric_column_is_rejected(registry):
+    before = registry.current()
+    # One bad cell turns transaction_count into a text column
+    rewrite(registry, 'district_data.csv', lambda text: text.replace('\n', '\nandaman & nicobar,x,oops,1.0,2024,1\n', 1))
+
+    with pytest.raises(SnapshotError, match='transaction_count'):
+        registry.reload()
+    assert registry.current() is before
+
+
+def test_builder_failure_is_rejected(registry, monkeypatch):
+    before = registry.current()
+    monkeypatch.setitem(dataset_registry.DERIVED_BUILDERS, 'device_cube', lambda frames: 1 / 0)
+    rewrite(registry, 'user_data.csv', lambda text: text + text.splitlines()[-1] + '\n')
+
+    with pytest.raises(SnapshotError, match='device_cube'):
+        registry.reload()
+    assert registry.current() is before
+
+
+def test_watcher_survives_unexpected_errors(registry, monkeypatch):
+    monkeypatch.setattr(dataset_registry, 'SETTLE_SECONDS', 0)
+    load, calls = registry._load, []
+
+    def flaky_load(versions):
+        calls.append(versions)
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        return load(versions)
+
+    monkeypatch.setattr(registry, '_load', flaky_load)
+    before = registry.current()
+    rewrite(registry, 'user_data.csv', lambda text: text + text.splitlines()[-1] + '\n')
+
+    registry.interval = 0.05
+    registry.start_watcher()
+    try:
+        deadline = time.monotonic() + 5
+        while registry.current() is before and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        registry.stop_watcher()
+
+    assert len(calls) >= 2
+    assert registry.current() is not before
+    assert registry.last_error is None
+
+
+def test_streaming_leaves_large_datasets_on_disk(data_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv('PHONEPE_STREAMING', '1')
+    snapshot = DatasetRegistry(data_dir, interval=0, snapshot_dir=tmp_path).current()
+
+    for name in dataset_registry.STREAMED_DATASETS:
+        assert snapshot.streamed(name)
+        with pytest.raises(TypeError):
+            snapshot.frame(name)
+    assert not snapshot.streamed('user_data.csv')
+
+    # The pincode index is built from streamed per-pincode totals
+    df = pd.read_csv(os.path.join(data_dir, 'pincode_data.csv'))
+    assert snapshot.derived['pincode_index'].total(5)['transaction_count'] == df.loc[
+        df['pincode'].astype('Int64').astype(str).str.startswith('5'), 'transaction_count'
+    ].sum()
+
+
+def test_versions_read_their_own_copies(registry):
+    before = registry.current()
+    path = before.path('user_data.csv')
+    assert path != os.path.join(registry.data_dir, 'user_data.csv')
+    frozen = open(path).read()
+
+    rewrite(registry, 'user_data.csv', lambda text: text + text.splitlines()[-1] + '\n')
+    assert registry.reload()
+    # The old version still reads exactly what it was loaded from
+    assert open(before.path('user_data.csv')).read() == frozen
+    assert registry.current().path('user_data.csv') != path
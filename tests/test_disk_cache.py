@@ -0,0 +1,54 @@
+import pandas as pd
+
+from utils import disk_cache
+from utils.disk_cache import DiskCache, disk_cached
+
+
+def test_frames_are_keyed_by_content(tmp_path):
+    calls = []
+
+    @disk_cached('v1', cache=DiskCache(tmp_path))
+    def total(df):
+        calls.append(1)
+        return int(df['count'].sum())
+
+    df = pd.DataFrame({'count': [1, 2, 3]})
+    assert total(df) == 6
+    assert total(df.copy()) == 6
+    # Same shape, columns and dtypes, different values
+    df.loc[0, 'count'] = 10
+    assert total(df) == 15
+    assert len(calls) == 2
+
+
+def test_changed_code_misses(tmp_path):
+    cache = DiskCache(tmp_path)
+    df = pd.DataFrame({'count': [1, 2, 3]})
+
+    def total(df):
+        return int(df['count'].sum())
+    assert disk_cached('v1', cache=cache)(total)(df) == 6
+
+    # Same name and module, new body: must not reuse the stored result
+    def total(df):
+        return int(df['count'].max())
+    assert disk_cached('v1', cache=cache)(total)(df) == 3
+
+
+def test_hits_refresh_access_time_only_when_stale(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path)
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache.time, 'time', lambda: now[0])
+    cache.set('k', 'value')
+
+    def last_access():
+        with cache._connect() as conn:
+            return conn.execute('SELECT last_access FROM entries WHERE key = ?', ('k',)).fetchone()[0]
+
+    now[0] += disk_cache.ACCESS_RESOLUTION / 2
+    assert cache.get('k') == 'value'
+    assert last_access() == 1000.0
+
+    now[0] += disk_cache.ACCESS_RESOLUTION
+    assert cache.get('k') == 'value'
+    assert last_access() == now[0]
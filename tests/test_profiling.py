@@ -0,0 +1,15 @@
+import os
+
+from utils.profiling import _prune_profiles
+
+
+def test_only_newest_profiles_are_kept(tmp_path):
+    for i in range(5):
+        path = tmp_path / f'page-{i}.folded'
+        path.write_text('main 1\n')
+        os.utime(path, ns=(i * 10**9, i * 10**9))
+    (tmp_path / 'notes.txt').write_text('not a profile')
+
+    _prune_profiles(tmp_path, keep=2)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['notes.txt', 'page-3.folded', 'page-4.folded']
@@ -0,0 +1,106 @@
+import os
+
+import pandas as pd
+import pytest
+
+from utils.disk_cache import dataset_version
+from utils.streaming import (
+    ChunkedCsv,
+    SourceChangedError,
+    group_argmax,
+    group_argmin,
+    group_sum,
+    iter_csv_chunks,
+    stream_potential,
+)
+
+# Small chunks so every file is split many times over
+CHUNK_ROWS = 500
+
+
+def chunks(path, usecols=None, dtype=None):
+    return iter_csv_chunks(path, usecols=usecols, chunk_rows=CHUNK_ROWS, dtype=dtype)
+
+
+def top_per_state(totals):
+    grouped = totals.reset_index()
+    return grouped.loc[grouped.groupby('state_name')['transaction_count'].idxmax()]
+
+
+def test_pincode_sums_match_in_memory(data_dir):
+    # Mirrors max_transaction_pincode: pincodes are grouped as strings
+    path = os.path.join(data_dir, 'pincode_data.csv')
+    usecols = ['state_name', 'pincode', 'transaction_count']
+    df = pd.read_csv(path)
+    df['pincode'] = df['pincode'].astype(str)
+    expected = df.groupby(['state_name', 'pincode'])['transaction_count'].sum()
+
+    streamed = group_sum(
+        (c.assign(pincode=c['pincode'].astype(str)) for c in chunks(path, usecols, {'pincode': 'float64'})),
+        ['state_name', 'pincode'],
+        'transaction_count'
+    )
+    pd.testing.assert_series_equal(streamed, expected)
+
+    pd.testing.assert_frame_equal(top_per_state(streamed), top_per_state(expected))
+
+
+def test_district_sums_match_in_memory(data_dir):
+    path = os.path.join(data_dir, 'district_data.csv')
+    df = pd.read_csv(path)
+    expected = df.groupby(['state_name', 'district'])['transaction_amount'].sum()
+
+    streamed = group_sum(chunks(path), ['state_name', 'district'], 'transaction_amount')
+    pd.testing.assert_series_equal(streamed, expected, check_exact=False, rtol=1e-12)
+
+
+@pytest.mark.parametrize('func,how', [(group_argmax, 'idxmax'), (group_argmin, 'idxmin')])
+def test_group_arg_matches_in_memory(data_dir, func, how):
+    path = os.path.join(data_dir, 'phonepe_trasaction.csv')
+    keys = ['trans_year', 'quarter']
+    df = pd.read_csv(path)
+    expected = df.loc[getattr(df.groupby(keys)['transaction_count'], how)()]
+
+    streamed = func(chunks(path), keys, 'transaction_count')
+    pd.testing.assert_frame_equal(streamed, expected)
+
+
+def test_potential_matches_in_memory(data_dir):
+    path = os.path.join(data_dir, 'phonepe_trasaction.csv')
+    df = pd.read_csv(path)
+    totals = df.groupby('district')['transaction_count'].sum().reset_index()
+    avg = totals['transaction_count'].mean()
+    totals['category'] = totals['transaction_count'].apply(
+        lambda x: 'HIGH' if x > avg else 'LOW' if x < avg * 0.5 else 'POTENTIAL'
+    )
+    expected = totals.sort_values(by='transaction_count', ascending=False)
+
+    streamed = stream_potential(chunks(path), 'district', 'transaction_count')
+    pd.testing.assert_frame_equal(streamed, expected)
+
+
+def test_chunked_csv_matches_frame(data_dir):
+    path = os.path.join(data_dir, 'pincode_data.csv')
+    df = pd.read_csv(path)
+    table = ChunkedCsv(path, dataset_version(path), dtype={'pincode': 'float64'}, budget_mb=0.05)
+
+    assert list(table.unique('state_name')) == list(df['state_name'].unique())
+    expected = df[df['trans_year'].isin([2019, 2020]) & df['quarter'].isin([1])]
+    pd.testing.assert_frame_equal(table.filter(trans_year=[2019, 2020], quarter=[1]), expected)
+    pd.testing.assert_frame_equal(
+        table.sum(['state_name', 'trans_year'], ['transaction_count']),
+        df.groupby(['state_name', 'trans_year'])[['transaction_count']].sum()
+    )
+    assert repr(table) == f"ChunkedCsv('pincode_data.csv', {dataset_version(path)!r})"
+
+
+def test_chunked_csv_refuses_changed_file(data_dir, tmp_path):
+    path = tmp_path / 'district_data.csv'
+    path.write_text(open(os.path.join(data_dir, 'district_data.csv')).read())
+    table = ChunkedCsv(str(path), dataset_version(path))
+    table.sum('state_name', 'transaction_count')
+
+    with open(path, 'a') as f:
+        f.write('Goa,North Goa,1,1.0,2025,1\n')
+    with pytest.raises(SourceChangedError):
+        table.sum('state_name', 'transaction_count')
@@ -0,0 +1,145 @@
+# ------------------------- #
+# 🚨 Batched Anomaly Detection
+# ------------------------- #
+# Every district / pincode quarterly series is laid out as one row of a
+# (series × quarter) matrix and scored at once with array operations:
+#   1. values are log-scaled so big and small regions are comparable,
+#   2. each series' typical quarter-of-year offset is removed (seasonality),
+#   3. each quarter is compared with the level + trend of the preceding
+#      quarters (medians), scaled by their median absolute deviation around
+#      that trend (a robust z-score).
+# No Python loop runs per series, so 100k series score in a few seconds.
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+QUARTERS_PER_YEAR = 4
+# Scales a median absolute deviation to a standard deviation for normal data
+MAD_TO_STD = 1.4826
+# Lower bound on the scale so flat series do not produce infinite scores
+MIN_SCALE = 0.1
+
+
+def series_matrix(df, keys, value, year_col='trans_year', quarter_col='quarter'):
+    """Pivot long quarterly data into (series labels, period labels, N × T matrix).
+
+    Quarters with no row are NaN; the period axis is continuous from the first
+    to the last quarter present in the data.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    years = pd.to_numeric(df[year_col]).astype(int)
+    quarters = pd.to_numeric(df[quarter_col]).astype(int)
+    first_year = years.min()
+    period = ((years - first_year) * QUARTERS_PER_YEAR + quarters - 1).to_numpy()
+
+    totals = (
+        pd.DataFrame({'period': period, value: pd.to_numeric(df[value]).to_numpy()})
+        .join(df[keys].reset_index(drop=True).set_axis(range(len(df))), how='left')
+        .groupby(keys + ['period'], sort=True)[value].sum()
+    )
+    series_codes, labels = pd.factorize(totals.index.droplevel('period'), sort=True)
+    periods = totals.index.get_level_values('period').to_numpy()
+
+    matrix = np.full((len(labels), periods.max() + 1), np.nan)
+    matrix[series_codes, periods] = totals.to_numpy(dtype=float)
+
+    labels = pd.DataFrame(list(labels), columns=keys) if len(keys) > 1 else pd.DataFrame({keys[0]: labels})
+    steps = np.arange(matrix.shape[1])
+    period_labels = pd.DataFrame({
+        year_col: first_year + steps // QUARTERS_PER_YEAR,
+        quarter_col: steps % QUARTERS_PER_YEAR + 1,
+    })
+    return labels, period_labels, matrix
+
+
+def deseasonalize(x):
+    """Remove each series' typical quarter-of-year offset (classical decomposition).
+
+    The trend is a centred 2×4 moving average; the offset for each quarter is
+    the median of (value - trend) over the years, centred to sum to zero.
+    """
+    n, t = x.shape
+    weights = np.array([0.5, 1, 1, 1, 0.5]) / QUARTERS_PER_YEAR
+    padded = np.pad(x, ((0, 0), (2, 2)), constant_values=np.nan)
+    trend = (sliding_window_view(padded, len(weights), axis=1) * weights).sum(axis=2)
+
+    pad = -t % QUARTERS_PER_YEAR
+    detrended = np.pad(x - trend, ((0, 0), (0, pad)), constant_values=np.nan)
+    offsets = _nanmedian(detrended.reshape(n, -1, QUARTERS_PER_YEAR), axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        offsets = np.nan_to_num(offsets - np.nanmean(offsets, axis=1, keepdims=True))
+    return x - np.tile(offsets, t // QUARTERS_PER_YEAR + 1)[:, :t]
+
+
+def robust_zscores(matrix, window=8, min_periods=4, log=True, seasonal=True):
+    """Robust z-score of every cell against the trend of the `window` quarters before it."""
+    x = np.log1p(np.clip(matrix, 0, None)) if log else np.asarray(matrix, dtype=float)
+    if seasonal:
+        x = deseasonalize(x)
+
+    n, t = x.shape
+    padded = np.concatenate([np.full((n, window), np.nan), x], axis=1)
+    # windows[:, i] holds the `window` quarters strictly before quarter i
+    windows = sliding_window_view(padded, window, axis=1)[:, :t]
+
+    # Local level and trend of each window: its median and median quarter-on-quarter change
+    level = _nanmedian(windows, axis=2)
+    slope = np.nan_to_num(_nanmedian(np.diff(windows, axis=2), axis=2))
+    offsets = np.arange(window) - (window - 1) / 2
+    residuals = windows - (level[:, :, None] + slope[:, :, None] * offsets)
+    mad = _nanmedian(np.abs(residuals), axis=2)
+    scale = np.maximum(MAD_TO_STD * mad, MIN_SCALE)
+
+    # Project the window's trend one quarter ahead to get the expected value
+    baseline = level + slope * (window + 1) / 2
+
+    z = (x - baseline) / scale
+    enough = np.sum(~np.isnan(windows), axis=2) >= min_periods
+    return np.where(enough, z, np.nan)
+
+
+def score_table(df, keys, value, window=8, min_periods=4, seasonal=True):
+    """Long table of every scored quarter with its robust z-score, strongest first.
+
+    Independent of the flagging threshold, so it can be computed (and cached)
+    once and filtered with flag_anomalies for any threshold.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    labels, periods, matrix = series_matrix(df, keys, value)
+    z = robust_zscores(matrix, window=window, min_periods=min_periods, seasonal=seasonal)
+
+    rows, cols = np.nonzero(np.isfinite(z))
+    result = pd.concat([
+        labels.iloc[rows].reset_index(drop=True),
+        periods.iloc[cols].reset_index(drop=True),
+    ], axis=1)
+    result[value] = matrix[rows, cols]
+    result['zscore'] = z[rows, cols]
+    result['direction'] = np.where(result['zscore'] > 0, 'SPIKE', 'DROP')
+    order = result['zscore'].abs().sort_values(ascending=False, kind='stable').index
+    return result.reindex(order).reset_index(drop=True)
+
+
+def flag_anomalies(scores, threshold=3.5):
+    """Rows of a score_table whose |robust z-score| is at least `threshold`."""
+    return scores[scores['zscore'].abs() >= threshold].reset_index(drop=True)
+
+
+def score_anomalies(df, keys, value, threshold=3.5, window=8, min_periods=4, seasonal=True):
+    """Long table of quarters whose |robust z-score| is at least `threshold`, strongest first."""
+    scores = score_table(df, keys, value, window=window, min_periods=min_periods, seasonal=seasonal)
+    return flag_anomalies(scores, threshold)
+
+
+def _nanmedian(a, axis):
+    """NaN-ignoring median via one sort (NaNs sort last); much faster than np.nanmedian
+    on many short slices. All-NaN slices give NaN."""
+    a = np.sort(np.moveaxis(a, axis, -1), axis=-1)
+    valid = np.sum(~np.isnan(a), axis=-1, keepdims=True)
+    lo = np.take_along_axis(a, np.maximum(valid - 1, 0) // 2, axis=-1)
+    hi = np.take_along_axis(a, valid // 2, axis=-1)
+    median = np.where(valid > 0, (lo + np.where(valid % 2 == 1, lo, hi)) / 2, np.nan)
+    return median[..., 0]
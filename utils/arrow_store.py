@@ -0,0 +1,114 @@
+# ------------------------- #
+# 🏹 Shared Memory-Mapped Arrow Datasets
+# ------------------------- #
+# When PHONEPE_ARROW_DIR is set, each CSV is converted once into an
+# uncompressed Arrow IPC (Feather v2) file in that directory and every
+# Streamlit worker memory-maps it instead of parsing its own copy. The
+# pages of all workers then share one physical copy in the OS page cache:
+# numeric columns come through zero-copy and string columns stay
+# Arrow-backed, so per-worker resident memory for the data itself stays
+# close to zero.
+#
+# Pre-build the files before starting the workers with:
+#     python -m utils.arrow_store data/*.csv
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from utils.disk_cache import dataset_version
+
+ARROW_DIR_ENV = 'PHONEPE_ARROW_DIR'
+
+# Schema metadata key holding the fingerprint of the CSV the file was built from
+SOURCE_VERSION_KEY = b'phonepe_source_version'
+
+
+def arrow_enabled():
+    return bool(os.environ.get(ARROW_DIR_ENV))
+
+
+def arrow_path(csv_path, arrow_dir=None):
+    arrow_dir = Path(arrow_dir or os.environ[ARROW_DIR_ENV])
+    return arrow_dir / (Path(csv_path).stem + '.arrow')
+
+
+def export_arrow(csv_path, arrow_dir=None):
+    """Convert a CSV into an uncompressed Arrow IPC file, atomically replacing any old one."""
+    import pyarrow as pa
+
+    target = arrow_path(csv_path, arrow_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    table = pa.Table.from_pandas(pd.read_csv(csv_path), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SOURCE_VERSION_KEY] = dataset_version(csv_path).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write beside the target and rename, so workers only ever map complete files
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+    os.close(fd)
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, target)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return target
+
+
+def _string_mapper(arrow_type):
+    import pyarrow as pa
+
+    # Keep strings in their Arrow buffers rather than materializing Python objects
+    if arrow_type in (pa.string(), pa.large_string()):
+        return pd.StringDtype('pyarrow')
+    return None
+
+
+def read_mapped(path):
+    """Memory-map an Arrow IPC file and wrap it as a DataFrame without copying where possible."""
+    import pyarrow as pa
+
+    source = pa.memory_map(str(path), 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True, types_mapper=_string_mapper)
+
+
+def _is_current(path, csv_path):
+    import pyarrow as pa
+
+    if not path.exists():
+        return False
+    with pa.memory_map(str(path), 'r') as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    return metadata.get(SOURCE_VERSION_KEY) == dataset_version(csv_path).encode()
+
+
+def load_csv(csv_path):
+    """Load a dataset, from the shared Arrow file when PHONEPE_ARROW_DIR is set."""
+    if not arrow_enabled():
+        return pd.read_csv(csv_path)
+
+    path = arrow_path(csv_path)
+    if not _is_current(path, csv_path):
+        try:
+            path = export_arrow(csv_path)
+        except OSError:
+            # Another worker may have the old file mapped (e.g. on Windows), so it cannot be
+            # replaced; never map a file built from another version of the CSV
+            if not _is_current(path, csv_path):
+                return pd.read_csv(csv_path)
+    return read_mapped(path)
+
+
+if __name__ == "__main__":
+    if not arrow_enabled():
+        sys.exit(f"Set {ARROW_DIR_ENV} to the directory the Arrow files should be written to.")
+    for csv_file in sys.argv[1:]:
+        print(f"{csv_file} -> {export_arrow(csv_file)}")
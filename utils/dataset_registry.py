@@ -0,0 +1,330 @@
+# ------------------------- #
+# 🔄 Hot Data Reload with Atomic Version Swap
+# ------------------------- #
+# The registry owns the active dataset version: every CSV the pages read,
+# plus the derived aggregates and indexes built from them. A background
+# watcher polls the data directory; when files change it waits until they
+# stop changing (so half-written files are never read), loads and validates
+# the new snapshot, builds its derived objects, and only then swaps it in
+# with a single reference assignment.
+#
+# Every version reads its own copies of the files, frozen in a directory
+# named after the version, so code that reads a file after the load (the
+# chunked readers of streaming mode) sees exactly the data the version was
+# validated with, even while the live files are being replaced.
+#
+# With PHONEPE_STREAMING=1 the large CSVs are validated chunk by chunk and
+# left on disk: the snapshot holds a ChunkedCsv for them instead of a
+# DataFrame, so memory does not grow with their size.
+#
+# Pages take one snapshot at the top of a rerun (current_datasets()) and use
+# it for the whole rerun, so a session never mixes two versions and never
+# waits on a reload in progress. Cache keys include the snapshot's versions,
+# so a swap invalidates version-keyed caches without clearing anything.
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from utils.arrow_store import load_csv
+from utils.device_cube import DeviceCube
+from utils.disk_cache import dataset_version
+from utils.joins import build_state_quarter_table
+from utils.pincode_index import METRICS as PINCODE_METRICS, PincodePrefixIndex
+from utils.streaming import ChunkedCsv, SourceChangedError, streaming_enabled
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR_ENV = 'PHONEPE_DATA_DIR'
+SNAPSHOT_DIR_ENV = 'PHONEPE_SNAPSHOT_DIR'
+DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parent.parent / '.cache' / 'snapshots'
+# Frozen versions kept on disk: the active one and the one sessions may still be finishing with
+KEEP_SNAPSHOTS = 2
+RELOAD_INTERVAL_ENV = 'PHONEPE_RELOAD_INTERVAL'
+DEFAULT_RELOAD_INTERVAL = 30
+# Seconds the files must stay unchanged before a new snapshot is loaded
+SETTLE_SECONDS = 2
+
+# Required columns of every dataset; a snapshot missing any of them is rejected
+DATASETS = {
+    'phonepe_trasaction.csv': ['state_name', 'trans_year', 'quarter', 'district', 'transaction_count', 'transaction_amount'],
+    'district_data.csv': ['state_name', 'district', 'transaction_count', 'transaction_amount', 'trans_year', 'quarter'],
+    'pincode_data.csv': ['state_name', 'pincode', 'transaction_count', 'transaction_amount', 'trans_year', 'quarter'],
+    'device_usage.csv': ['state_name', 'reg_user', 'app_opens', 'brand', 'count', 'percentage', 'trans_year', 'quarter'],
+    'agg_trans_detail.csv': ['state_name', 'mode_of_trans', 'trans_count', 'amount_transfer', 'trans_year', 'quarter'],
+    'user_data.csv': ['state_name', 'user_year', 'quarter', 'reguser', 'appopens'],
+}
+
+# Columns the pages aggregate; they must parse as numbers or the snapshot is rejected
+NUMERIC_COLUMNS = {
+    'phonepe_trasaction.csv': ['trans_year', 'quarter', 'transaction_count', 'transaction_amount'],
+    'district_data.csv': ['transaction_count', 'transaction_amount', 'trans_year', 'quarter'],
+    'pincode_data.csv': ['pincode', 'transaction_count', 'transaction_amount', 'trans_year', 'quarter'],
+    'device_usage.csv': ['reg_user', 'app_opens', 'count', 'percentage', 'trans_year', 'quarter'],
+    'agg_trans_detail.csv': ['trans_count', 'amount_transfer', 'trans_year', 'quarter'],
+    'user_data.csv': ['user_year', 'quarter', 'reguser', 'appopens'],
+}
+
+# Datasets left on disk and read in chunks in streaming mode
+STREAMED_DATASETS = ('phonepe_trasaction.csv', 'district_data.csv', 'pincode_data.csv')
+
+# Dtypes pinned for chunked reads, where inference only sees one chunk at a time.
+# pincode has gaps, so the whole-file read infers float64; chunks must match
+CSV_DTYPES = {
+    'pincode_data.csv': {'pincode': 'float64'},
+}
+
+
+def _pincode_index(table):
+    if isinstance(table, ChunkedCsv):
+        # Per-pincode totals are all the index needs; they are small even for a huge file
+        table = table.sum('pincode', list(PINCODE_METRICS)).reset_index()
+    return PincodePrefixIndex(table)
+
+
+# Derived objects built for every version before it goes live: name -> builder(frames)
+DERIVED_BUILDERS = {
+    'pincode_index': lambda frames: _pincode_index(frames['pincode_data.csv']),
+    'device_cube': lambda frames: DeviceCube(frames['device_usage.csv']),
+    'state_quarter': lambda frames: build_state_quarter_table(
+        frames['agg_trans_detail.csv'], frames['user_data.csv'], frames['device_usage.csv']
+    ),
+}
+
+
+class SnapshotError(Exception):
+    """Raised when a data snapshot fails validation; the active version stays live."""
+
+
+class DatasetVersion:
+    """One immutable, fully built snapshot of all datasets."""
+
+    def __init__(self, data_dir, versions, frames, derived, files):
+        self.data_dir = data_dir
+        self.files = files
+        self.versions = versions
+        self.version = dataset_key(versions)
+        self.frames = frames
+        self.derived = derived
+        self.loaded_at = datetime.now()
+
+    def frame(self, name):
+        # Shallow copy: pages may add/replace columns without touching the shared frame
+        table = self.frames[name]
+        if isinstance(table, ChunkedCsv):
+            raise TypeError(f"{name} is streamed in this snapshot; use table() instead")
+        return table.copy(deep=False)
+
+    def table(self, name):
+        """The loaded DataFrame, or the ChunkedCsv of a dataset left on disk in streaming mode."""
+        table = self.frames[name]
+        return table if isinstance(table, ChunkedCsv) else table.copy(deep=False)
+
+    def streamed(self, name):
+        return isinstance(self.frames[name], ChunkedCsv)
+
+    def path(self, name):
+        # This version's frozen copy, never the live file
+        return self.files[name]
+
+
+def _check_numeric(name, df):
+    """Coerce text columns that hold numbers; reject the snapshot if any value is not a number."""
+    converted = {}
+    for col in NUMERIC_COLUMNS.get(name, []):
+        if pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        try:
+            converted[col] = pd.to_numeric(df[col], errors='raise')
+        except (ValueError, TypeError) as e:
+            raise SnapshotError(f"{name} column {col!r} is not numeric: {e}") from e
+    return df.assign(**converted) if converted else df
+
+
+def dataset_key(versions):
+    return '-'.join(versions[name][:6] for name in sorted(versions))
+
+
+def _freeze_file(source, target):
+    # Copy, not hard-link: a writer that rewrites the live file in place would change a link too
+    tmp = target.with_name(f'{target.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        shutil.copy2(source, tmp)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class DatasetRegistry:
+    def __init__(self, data_dir=None, interval=None, snapshot_dir=None):
+        self.data_dir = data_dir or os.environ.get(DATA_DIR_ENV, '.')
+        self.snapshot_dir = Path(snapshot_dir or os.environ.get(SNAPSHOT_DIR_ENV) or DEFAULT_SNAPSHOT_DIR)
+        if interval is None:
+            interval = float(os.environ.get(RELOAD_INTERVAL_ENV, DEFAULT_RELOAD_INTERVAL))
+        self.interval = interval
+        self.last_error = None
+        self._swap_lock = threading.Lock()
+        self._listeners = []
+        self._stop_event = threading.Event()
+        self._active = self._load(self._fingerprint())
+        self._watcher = None
+
+    # ------------------------- #
+    # 📸 Snapshots
+    # ------------------------- #
+    def _path(self, name):
+        return os.path.join(self.data_dir, name)
+
+    def _fingerprint(self):
+        return {name: dataset_version(self._path(name)) for name in DATASETS}
+
+    def _freeze(self, versions):
+        """Copy the files into this version's own directory; returns name -> frozen path."""
+        directory = self.snapshot_dir / dataset_key(versions)
+        directory.mkdir(parents=True, exist_ok=True)
+        os.utime(directory)  # most recently used, for _prune_snapshots
+        files = {}
+        for name, version in versions.items():
+            target = directory / name
+            # Another worker may already have frozen this version
+            if not (target.exists() and dataset_version(target) == version):
+                _freeze_file(self._path(name), target)
+            if dataset_version(target) != version:
+                raise SnapshotError(f"{name} changed while it was being copied")
+            files[name] = str(target)
+        return files
+
+    def _prune_snapshots(self):
+        directories = sorted(
+            (d for d in self.snapshot_dir.iterdir() if d.is_dir()),
+            key=lambda d: d.stat().st_mtime,
+            reverse=True
+        )
+        active = Path(self._active.path(next(iter(DATASETS)))).parent
+        for directory in directories[KEEP_SNAPSHOTS:]:
+            if directory != active:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def _load(self, versions):
+        files = self._freeze(versions)
+        frames = {}
+        streaming = streaming_enabled()
+        for name, columns in DATASETS.items():
+            if streaming and name in STREAMED_DATASETS:
+                frames[name] = self._check_chunks(name, files[name], columns, versions[name])
+                continue
+            df = load_csv(files[name])
+            missing = [c for c in columns if c not in df.columns]
+            if missing:
+                raise SnapshotError(f"{name} is missing columns {missing}")
+            if df.empty:
+                raise SnapshotError(f"{name} has no rows")
+            frames[name] = _check_numeric(name, df)
+
+        # The copies are private, but check anyway that nothing rewrote them while loading
+        if {name: dataset_version(path) for name, path in files.items()} != versions:
+            raise SnapshotError("data files changed while loading")
+
+        derived = {}
+        for name, build in DERIVED_BUILDERS.items():
+            try:
+                derived[name] = build(frames)
+            except Exception as e:
+                # Data the validation above let through can still break a builder
+                raise SnapshotError(f"building {name} failed: {e!r}") from e
+        return DatasetVersion(self.data_dir, versions, frames, derived, files)
+
+    def _check_chunks(self, name, path, columns, version):
+        """Validate a streamed dataset one chunk at a time without keeping it."""
+        table = ChunkedCsv(path, version, dtype=CSV_DTYPES.get(name))
+        try:
+            missing = [c for c in columns if c not in table.columns()]
+            if missing:
+                raise SnapshotError(f"{name} is missing columns {missing}")
+            rows = 0
+            for chunk in table.chunks():
+                _check_numeric(name, chunk)
+                rows += len(chunk)
+        except (ValueError, TypeError, SourceChangedError) as e:
+            # A pinned dtype that does not parse is a bad value, like in _check_numeric
+            raise SnapshotError(f"{name} could not be read: {e}") from e
+        if not rows:
+            raise SnapshotError(f"{name} has no rows")
+        return table
+
+    def current(self):
+        return self._active
+
+    def on_swap(self, callback):
+        """Call callback(old, new) after every swap, e.g. to drop non-versioned caches."""
+        self._listeners.append(callback)
+
+    def reload(self):
+        """Load the files as they are now and swap them in if they differ; returns True on swap."""
+        versions = self._fingerprint()
+        if versions == self._active.versions:
+            return False
+        new = self._load(versions)
+        with self._swap_lock:
+            old, self._active = self._active, new
+        logger.info("Swapped dataset version %s -> %s", old.version, new.version)
+        self._prune_snapshots()
+        for callback in self._listeners:
+            callback(old, new)
+        return True
+
+    # ------------------------- #
+    # 👀 Background Watcher
+    # ------------------------- #
+    def start_watcher(self):
+        if self.interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name='dataset-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop_event.set()
+
+    def _watch(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                seen = self._fingerprint()
+                if seen == self._active.versions:
+                    continue
+                # Wait for writers to finish: the files must stop changing before we read them
+                if self._stop_event.wait(SETTLE_SECONDS) or self._fingerprint() != seen:
+                    continue
+                self.reload()
+                self.last_error = None
+            except Exception as e:
+                # Whatever went wrong, keep serving the active version and keep
+                # polling: a dead watcher would silently stop all future reloads
+                self.last_error = f"{time.strftime('%H:%M:%S')} {e}"
+                logger.warning("Dataset reload skipped: %s", e, exc_info=not isinstance(e, SnapshotError))
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Process-wide registry; the first call loads the data and starts the watcher."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = DatasetRegistry()
+                registry.start_watcher()
+                _registry = registry
+    return _registry
+
+
+def current_datasets():
+    """The active snapshot; take it once per rerun and use it throughout."""
+    return get_registry().current()
@@ -0,0 +1,112 @@
+# ------------------------- #
+# 🧊 Dense State × Brand × Quarter Device Cube
+# ------------------------- #
+# device_usage.csv has one row per (state, brand, year, quarter). The cube
+# materializes reg_user, count and percentage once as dense NumPy arrays
+# indexed [state, brand, period], so the Device page answers its charts by
+# slicing and summing arrays instead of filtering and grouping the frame on
+# every interaction.
+import numpy as np
+import pandas as pd
+
+METRICS = ('reg_user', 'count', 'percentage')
+
+# Marks "no row" in the original-row-position array
+MISSING_ROW = np.iinfo(np.int64).max
+
+
+class DeviceCube:
+    """Device usage metrics as dense [state, brand, period] arrays."""
+
+    def __init__(self, device_df):
+        self.frame = device_df
+
+        state_codes, self.states = pd.factorize(device_df['state_name'], sort=True)
+        brand_codes, self.brands = pd.factorize(device_df['brand'], sort=True)
+        period_keys = device_df['trans_year'].to_numpy() * 10 + device_df['quarter'].to_numpy()
+        period_codes, periods = pd.factorize(period_keys, sort=True)
+        self.period_year = np.asarray(periods) // 10
+        self.period_quarter = np.asarray(periods) % 10
+        self.shape = (len(self.states), len(self.brands), len(periods))
+        cell = (state_codes, brand_codes, period_codes)
+
+        self.present = np.zeros(self.shape, dtype=bool)
+        self.present[cell] = True
+
+        # Original row position of each cell, used to reproduce pandas idxmax tie-breaking
+        self.row = np.full(self.shape, MISSING_ROW, dtype=np.int64)
+        np.minimum.at(self.row, cell, np.arange(len(device_df)))
+
+        self.arrays = {}
+        for metric in METRICS:
+            values = device_df[metric].to_numpy()
+            arr = np.zeros(self.shape, dtype=values.dtype)
+            np.add.at(arr, cell, values)
+            self.arrays[metric] = arr
+
+    # ------------------------- #
+    # 🔪 Slicing Helpers
+    # ------------------------- #
+    def _mask(self, labels, selected):
+        if selected is None:
+            return np.ones(len(labels), dtype=bool)
+        return np.isin(np.asarray(labels), list(selected))
+
+    def _period_mask(self, years=None, quarters=None):
+        return self._mask(self.period_year, years) & self._mask(self.period_quarter, quarters)
+
+    def _select(self, metric, states=None, brands=None, years=None, quarters=None):
+        s = self._mask(self.states, states)
+        b = self._mask(self.brands, brands)
+        p = self._period_mask(years, quarters)
+        return self.arrays[metric][np.ix_(s, b, p)], self.present[np.ix_(s, b, p)], s, b
+
+    # ------------------------- #
+    # ➕ Aggregations
+    # ------------------------- #
+    def brand_totals(self, metric='count', states=None, years=None, quarters=None):
+        """Metric summed per brand over the selected states/periods (brand share donut)."""
+        values, present, _, b = self._select(metric, states=states, years=years, quarters=quarters)
+        has_rows = present.any(axis=(0, 2))
+        result = pd.DataFrame({
+            'brand': np.asarray(self.brands)[b][has_rows],
+            metric: values.sum(axis=(0, 2))[has_rows],
+        })
+        return result.sort_values(by=metric, ascending=False)
+
+    def state_totals(self, metric='reg_user', brands=None, years=None, quarters=None):
+        """Metric summed per state over the selected brands/periods (per-state bars)."""
+        values, present, s, _ = self._select(metric, brands=brands, years=years, quarters=quarters)
+        has_rows = present.any(axis=(1, 2))
+        result = pd.DataFrame({
+            'state_name': np.asarray(self.states)[s][has_rows],
+            metric: values.sum(axis=(1, 2))[has_rows],
+        })
+        return result.sort_values(by=metric, ascending=False)
+
+    def top_rows_per_state_year(self, metric='reg_user'):
+        """Original rows holding the max metric per (state, year), ordered by state then year.
+
+        Matches device_df.loc[device_df.groupby(['state_name', 'trans_year'])[metric].idxmax()],
+        including keeping the first row on ties.
+        """
+        values = self.arrays[metric].astype(float)
+        valid = self.present & ~np.isnan(values)
+        values = np.where(valid, values, -np.inf)
+
+        rows_by_year = []
+        for year in np.unique(self.period_year):
+            p = self.period_year == year
+            vals = values[:, :, p].reshape(self.shape[0], -1)
+            rows = self.row[:, :, p].reshape(self.shape[0], -1)
+            best = vals.max(axis=1)
+            first = np.where(vals == best[:, None], rows, MISSING_ROW).min(axis=1)
+            rows_by_year.append(np.where(np.isfinite(best), first, MISSING_ROW))
+
+        # [state, year] layout flattened row-major gives state-then-year order
+        rows = np.stack(rows_by_year, axis=1).ravel()
+        return rows[rows != MISSING_ROW]
+
+    def top_brand_per_state_year(self, metric='reg_user'):
+        """Rows of the original frame for the top brand per (state, year)."""
+        return self.frame.iloc[self.top_rows_per_state_year(metric)]
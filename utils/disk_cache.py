@@ -0,0 +1,271 @@
+# ------------------------- #
+# 💾 Persistent On-Disk Result Cache
+# ------------------------- #
+# Aggregated DataFrames and figure JSON are written to disk so a deploy or a
+# worker recycle comes back warm. Entries are keyed by dataset version, the
+# code that produced them (the function's bytecode plus the source of the
+# utils package) and the arguments, with DataFrame arguments hashed by
+# content. DataFrames are stored as Parquet, figures as compressed Plotly
+# JSON, and the total size is bounded with least-recently-used eviction.
+#
+# Several Streamlit processes can share one cache directory: the index is a
+# SQLite database in WAL mode and every payload is written to a temp file and
+# renamed into place, so a reader never sees a half-written entry. Writers
+# serialize on one lock, so a hit only writes its access time back when the
+# stored one is more than ACCESS_RESOLUTION seconds old; the LRU order is
+# kept to that resolution and most hits are plain reads.
+import functools
+import hashlib
+import io
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import pandas as pd
+
+CACHE_DIR_ENV = 'PHONEPE_CACHE_DIR'
+CACHE_MAX_MB_ENV = 'PHONEPE_CACHE_MAX_MB'
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / '.cache' / 'results'
+DEFAULT_MAX_MB = 256
+
+# Seconds a process waits for another process holding the index write lock
+LOCK_TIMEOUT = 30
+# Hits within this many seconds of the stored access time do not update it
+ACCESS_RESOLUTION = 60
+
+_MISSING = object()
+
+
+def dataset_version(*paths):
+    """Short fingerprint of the data files (name, size, mtime) used in cache keys."""
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f'{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()[:16]
+
+
+# ------------------------- #
+# 📦 Payload Encoding
+# ------------------------- #
+def _encode(value):
+    """Return (kind, bytes) for a value using the most compact supported format."""
+    if isinstance(value, pd.DataFrame):
+        try:
+            buffer = io.BytesIO()
+            value.to_parquet(buffer)
+            return 'parquet', buffer.getvalue()
+        except (ImportError, ValueError, TypeError):
+            pass  # e.g. non-string column labels; fall back to pickle
+    elif isinstance(value, str):
+        return 'json', zlib.compress(value.encode('utf-8'))
+    elif type(value).__module__.startswith('plotly.'):
+        return 'figure', zlib.compress(value.to_json().encode('utf-8'))
+    return 'pickle', pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(kind, payload):
+    if kind == 'parquet':
+        return pd.read_parquet(io.BytesIO(payload))
+    if kind == 'json':
+        return zlib.decompress(payload).decode('utf-8')
+    if kind == 'figure':
+        import plotly.io as pio
+        return pio.from_json(zlib.decompress(payload).decode('utf-8'))
+    return pickle.loads(payload)
+
+
+def _fingerprint(value):
+    # Pages pass frames they have already modified, so frames are identified by content, not layout
+    if isinstance(value, pd.DataFrame):
+        return ('frame', value.shape, [str(c) for c in value.columns], value.dtypes.astype(str).tolist(), _content_hash(value))
+    if isinstance(value, pd.Series):
+        return ('series', value.shape, str(value.name), str(value.dtype), _content_hash(value))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        return (type(value).__name__, [_fingerprint(v) for v in items])
+    if isinstance(value, dict):
+        return ('dict', sorted((repr(k), _fingerprint(v)) for k, v in value.items()))
+    return repr(value)
+
+
+def _content_hash(value):
+    try:
+        rows = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        return hashlib.sha1(rows.tobytes()).hexdigest()
+    except TypeError:
+        # Unhashable cells (e.g. lists); pickling is slower but still content-based
+        return hashlib.sha1(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def _code_fingerprint(func):
+    """Hash of a function's bytecode and constants, nested functions included."""
+    digest = hashlib.sha1()
+
+    def visit(code):
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode('utf-8'))
+        for const in code.co_consts:
+            if hasattr(const, 'co_code'):
+                visit(const)
+            else:
+                digest.update(repr(const).encode('utf-8'))
+
+    visit(func.__code__)
+    digest.update(repr(func.__defaults__).encode('utf-8'))
+    digest.update(_utils_fingerprint().encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=None)
+def _utils_fingerprint():
+    # Cached functions call into utils (anomaly scoring, forecasting, ...), so a change
+    # there must invalidate them too even though the caller's bytecode is unchanged
+    digest = hashlib.sha1()
+    for path in sorted(Path(__file__).resolve().parent.glob('*.py')):
+        digest.update(path.name.encode('utf-8'))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+# ------------------------- #
+# 🗄️ Cache
+# ------------------------- #
+class DiskCache:
+    """Size-bounded LRU cache stored in a directory shared by all worker processes."""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = Path(directory or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, kind TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+
+    def _connect(self):
+        # One short-lived connection per call: sqlite3 connections must not cross threads
+        conn = sqlite3.connect(self.directory / 'index.sqlite', timeout=LOCK_TIMEOUT, isolation_level=None)
+        return _Closing(conn)
+
+    def _path(self, key):
+        return self.directory / f'{key}.bin'
+
+    @staticmethod
+    def make_key(version, name, args=(), kwargs=None):
+        raw = repr((version, name, _fingerprint(list(args)), _fingerprint(kwargs or {})))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key, default=None):
+        with self._connect() as conn:
+            row = conn.execute('SELECT kind, last_access FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return default
+            try:
+                value = _decode(row[0], self._path(key).read_bytes())
+            except Exception:
+                # Evicted by another process or unreadable: drop the entry and recompute
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                return default
+            now = time.time()
+            if now - row[1] > ACCESS_RESOLUTION:
+                conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+        return value
+
+    def set(self, key, value):
+        kind, payload = _encode(value)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            # Best effort: another process may hold the file open (e.g. on Windows)
+            _unlink(tmp_path)
+            return
+
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, kind, size, last_access) VALUES (?, ?, ?, ?)',
+                (key, kind, len(payload), time.time())
+            )
+            evicted = self._evict(conn)
+            conn.execute('COMMIT')
+        for old_key in evicted:
+            _unlink(self._path(old_key))
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append(key)
+            total -= size
+        conn.executemany('DELETE FROM entries WHERE key = ?', [(k,) for k in evicted])
+        return evicted
+
+    def clear(self):
+        with self._connect() as conn:
+            keys = [k for (k,) in conn.execute('SELECT key FROM entries').fetchall()]
+            conn.execute('DELETE FROM entries')
+        for key in keys:
+            _unlink(self._path(key))
+
+
+class _Closing:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.conn.in_transaction:
+            self.conn.execute('ROLLBACK')
+        self.conn.close()
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+@functools.lru_cache(maxsize=None)
+def default_cache():
+    return DiskCache()
+
+
+def disk_cached(version, cache=None):
+    """Cache a pure function's result on disk, keyed by dataset version, code and arguments.
+
+    version is a string or a zero-argument callable (e.g. lambda: dataset_version(path))
+    that identifies the data the function reads.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}:{_code_fingerprint(func)}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            store = cache or default_cache()
+            current = version() if callable(version) else version
+            key = store.make_key(current, name, args, kwargs)
+            value = store.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                store.set(key, value)
+            return value
+        return wrapper
+    return decorator
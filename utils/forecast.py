@@ -0,0 +1,134 @@
+# ------------------------- #
+# 🔮 Batched Next-Quarter Forecasting
+# ------------------------- #
+# Fits a log-linear trend + quarter-of-year model to every district at once.
+# All series share the same design matrix (intercept, trend, quarter
+# dummies), so the fit for the whole (district × quarter) matrix is a single
+# least-squares solve with one right-hand side per district. Series with
+# missing quarters are grouped by their missing-data pattern and each
+# pattern is solved in one batch as well.
+#
+# The forecast starts from the last observed quarter, not from the fitted
+# line: growth is slowing, so extrapolating a 3-year regression line
+# overshoots. One damped trend step and the seasonal change between the
+# two quarters are added to that level. backtest_forecast replays the
+# forecast on held-out quarters next to the naive "same as last quarter"
+# forecast, so the page only shows the forecast when it beats the naive one.
+# A series missing from the last quarter (a district that was dropped or
+# renamed) has nothing to anchor on and gets no forecast, and neither does
+# a series with fewer than `min_periods` observed quarters (a new district).
+import numpy as np
+import pandas as pd
+
+from utils.anomaly import series_matrix
+
+QUARTERS_PER_YEAR = 4
+COEFFICIENTS = ('intercept', 'trend', 'q2', 'q3', 'q4')
+# Share of the fitted quarterly growth carried into the next quarter
+TREND_DAMPING = 0.7
+
+
+def design_matrix(steps, quarters):
+    """Rows of [1, t, Q2, Q3, Q4] for the given period steps and quarter numbers."""
+    quarters = np.asarray(quarters)
+    return np.column_stack([
+        np.ones(len(steps)),
+        np.asarray(steps, dtype=float),
+        quarters == 2,
+        quarters == 3,
+        quarters == 4,
+    ]).astype(float)
+
+
+def fit_batch(matrix, quarters, min_periods=6):
+    """Least-squares coefficients (N × 5) for every row of a log-scaled matrix.
+
+    Rows with fewer than `min_periods` observed quarters get NaN coefficients.
+    """
+    n, t = matrix.shape
+    X = design_matrix(np.arange(t), quarters)
+    params = np.full((n, X.shape[1]), np.nan)
+
+    observed = ~np.isnan(matrix)
+    patterns, pattern_of_row = np.unique(observed, axis=0, return_inverse=True)
+    for p, mask in enumerate(patterns):
+        if mask.sum() < min_periods:
+            continue
+        rows = np.flatnonzero(pattern_of_row.ravel() == p)
+        # One solve for every series sharing this pattern: X[mask] @ B = Y[rows][:, mask].T
+        coef, *_ = np.linalg.lstsq(X[mask], matrix[np.ix_(rows, mask)].T, rcond=None)
+        params[rows] = coef.T
+    return params
+
+
+def forecast_next(log_matrix, quarters, next_quarter, damping=TREND_DAMPING):
+    """Coefficients and log-scale next-quarter forecast for every row of log_matrix.
+
+    Rows without a value in the last column get a NaN forecast.
+    """
+    params = fit_batch(log_matrix, quarters)
+    t = log_matrix.shape[1]
+    x_last = design_matrix([t - 1], [quarters[-1]])[0]
+    x_next = design_matrix([t], [next_quarter])[0]
+
+    # Anchor on the last quarter; NaN there stays NaN instead of extrapolating a stale series
+    level = log_matrix[:, -1]
+    seasonal_change = params[:, 2:] @ (x_next[2:] - x_last[2:])
+    return params, level + damping * params[:, 1] + seasonal_change
+
+
+def _log_matrix(df, value, keys):
+    labels, periods, matrix = series_matrix(df, list(keys), value)
+    return labels, periods, np.log1p(np.clip(matrix, 0, None))
+
+
+def fit_district_forecast(df, value='transaction_count', keys=('state_name', 'district'), history=12):
+    """Fitted coefficients and next-quarter forecast for every series in df.
+
+    Only the last `history` quarters are used, so the trend follows recent growth.
+    """
+    labels, periods, log_matrix = _log_matrix(df, value, keys)
+    log_matrix, periods = log_matrix[:, -history:], periods.iloc[-history:].reset_index(drop=True)
+
+    last = periods.iloc[-1]
+    next_year = int(last['trans_year']) + int(last['quarter']) // QUARTERS_PER_YEAR
+    next_quarter = int(last['quarter']) % QUARTERS_PER_YEAR + 1
+    params, log_forecast = forecast_next(log_matrix, periods['quarter'].to_numpy(), next_quarter)
+
+    result = labels.copy()
+    for name, column in zip(COEFFICIENTS, params.T):
+        result[name] = column
+    result['next_year'] = next_year
+    result['next_quarter'] = next_quarter
+    result['forecast'] = np.expm1(log_forecast).clip(min=0)
+    return result
+
+
+def backtest_forecast(df, value='transaction_count', keys=('state_name', 'district'), history=12, holdout=4):
+    """Forecast each of the last `holdout` quarters from the quarters before it.
+
+    One row per held-out quarter with the mean absolute percentage error of
+    the forecast and of the naive forecast (repeat the previous quarter).
+    """
+    _, periods, log_matrix = _log_matrix(df, value, keys)
+    quarters = periods['quarter'].to_numpy()
+    rows = []
+    for end in range(log_matrix.shape[1] - holdout, log_matrix.shape[1]):
+        start = max(0, end - history)
+        _, log_forecast = forecast_next(log_matrix[:, start:end], quarters[start:end], quarters[end])
+        actual, naive = np.expm1(log_matrix[:, end]), np.expm1(log_matrix[:, end - 1])
+        scored = (actual > 0) & np.isfinite(log_forecast) & np.isfinite(naive)
+        rows.append({
+            'trans_year': int(periods['trans_year'].iloc[end]),
+            'quarter': int(quarters[end]),
+            'series': int(scored.sum()),
+            'forecast_mape': _mape(np.expm1(log_forecast), actual, scored),
+            'naive_mape': _mape(naive, actual, scored),
+        })
+    return pd.DataFrame(rows, columns=['trans_year', 'quarter', 'series', 'forecast_mape', 'naive_mape'])
+
+
+def _mape(predicted, actual, mask):
+    if not mask.any():
+        return np.nan
+    return float(np.mean(np.abs(predicted[mask].clip(min=0) - actual[mask]) / actual[mask]))
@@ -0,0 +1,65 @@
+# ------------------------- #
+# 🔗 Cross-Dataset State × Quarter Join
+# ------------------------- #
+# Transactions (agg_trans_detail.csv), users (user_data.csv) and devices
+# (device_usage.csv) spell state names differently ("andaman & nicobar
+# islands", "Andaman & Nicobar Islands", "andaman-&-nicobar-islands") and
+# name the year column differently. This module aligns them on normalized
+# (state, year, quarter) keys once per dataset version and materializes the
+# per-user metrics the pages need in one table.
+KEYS = ['state_name', 'trans_year', 'quarter']
+
+
+def normalize_state(names):
+    """Lower-case, hyphens to spaces, collapsed whitespace."""
+    return (
+        names.astype(str)
+        .str.lower()
+        .str.replace('-', ' ', regex=False)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+
+
+def _ratio(numerator, denominator):
+    # Undefined (NaN) rather than inf where the denominator is zero
+    return (numerator / denominator.where(denominator > 0)).astype(float)
+
+
+def build_state_quarter_table(agg_df, user_df, device_df):
+    """One row per (state, year, quarter) with transaction, user and device metrics."""
+    trans = (
+        agg_df.assign(state_name=normalize_state(agg_df['state_name']))
+        .groupby(KEYS, as_index=False)[['trans_count', 'amount_transfer']].sum()
+    )
+
+    users = (
+        user_df.assign(state_name=normalize_state(user_df['state_name']))
+        .rename(columns={'user_year': 'trans_year', 'reguser': 'reg_user', 'appopens': 'app_opens'})
+        .groupby(KEYS, as_index=False)[['reg_user', 'app_opens']].sum()
+    )
+    # App opens were not reported before 2019 Q2 and come through as 0: mark them missing, not zero
+    users['app_opens'] = users['app_opens'].where(users['app_opens'] > 0)
+
+    # Device rows repeat the state's users per brand; keep only the leading brand and its share
+    devices = device_df.assign(state_name=normalize_state(device_df['state_name']))
+    top = devices.loc[devices.groupby(KEYS)['count'].idxmax(), KEYS + ['brand', 'percentage']]
+    top = top.rename(columns={'brand': 'top_brand', 'percentage': 'top_brand_share'})
+
+    table = trans.merge(users, on=KEYS, how='outer').merge(top, on=KEYS, how='left')
+    table['trans_per_user'] = _ratio(table['trans_count'], table['reg_user'])
+    table['avg_ticket_size'] = _ratio(table['amount_transfer'], table['trans_count'])
+    table['opens_per_user'] = _ratio(table['app_opens'], table['reg_user'])
+    return table.sort_values(by=KEYS).reset_index(drop=True)
+
+
+def national_quarter_metrics(table):
+    """Country-wide totals per quarter with per-user metrics recomputed from the totals."""
+    totals = table.groupby(['trans_year', 'quarter'], as_index=False)[
+        ['trans_count', 'amount_transfer', 'reg_user', 'app_opens']
+    ].sum(min_count=1)
+    totals['trans_per_user'] = _ratio(totals['trans_count'], totals['reg_user'])
+    totals['avg_ticket_size'] = _ratio(totals['amount_transfer'], totals['trans_count'])
+    totals['opens_per_user'] = _ratio(totals['app_opens'], totals['reg_user'])
+    totals['Year_Quarter'] = totals['trans_year'].astype(str) + " Q" + totals['quarter'].astype(str)
+    return totals
@@ -0,0 +1,98 @@
+# ------------------------- #
+# 📮 Hierarchical Pincode Prefix Index
+# ------------------------- #
+# Indian pincodes are hierarchical: the 1st digit is the postal zone, the
+# first 2 digits the sub-zone and the first 3 digits the sorting district.
+# The index keeps every pincode sorted as an integer together with running
+# (cumulative) totals, so the total for any prefix is a single subtraction
+# over the range found with a binary search. Totals for every prefix at
+# every level are also pre-aggregated once at build time.
+import numpy as np
+import pandas as pd
+
+PINCODE_DIGITS = 6
+
+# Prefix length (number of leading digits) for each drill-down level
+LEVELS = {
+    'zone': 1,
+    'sub_zone': 2,
+    'sorting_district': 3,
+    'pincode': PINCODE_DIGITS,
+}
+
+METRICS = ('transaction_count', 'transaction_amount')
+
+
+class PincodePrefixIndex:
+    """Sorted-array prefix index over integer pincodes with per-level totals."""
+
+    def __init__(self, df, metrics=METRICS):
+        self.metrics = tuple(metrics)
+
+        # Aggregate to one row per pincode and sort by the integer pincode
+        pins = pd.to_numeric(df['pincode'], errors='coerce')
+        df = df[pins.notna()]
+        pins = pins[pins.notna()].astype('int64').to_numpy()
+        per_pin = (
+            pd.DataFrame({m: df[m].to_numpy() for m in self.metrics})
+            .groupby(pins, sort=True)
+            .sum()
+        )
+        self.pincodes = per_pin.index.to_numpy(dtype='int64')
+
+        # Running totals with a leading zero: total(lo:hi) = cum[hi] - cum[lo]
+        self._cum = {
+            m: np.concatenate(([0], np.cumsum(per_pin[m].to_numpy())))
+            for m in self.metrics
+        }
+
+        # Pre-aggregated totals for every prefix at every level
+        self._levels = {level: self._build_level(digits) for level, digits in LEVELS.items()}
+
+    def _build_level(self, digits):
+        prefixes = self.pincodes // 10 ** (PINCODE_DIGITS - digits)
+        keys, starts = np.unique(prefixes, return_index=True)
+        ends = np.append(starts[1:], len(prefixes))
+        totals = pd.DataFrame({'prefix': keys})
+        for m in self.metrics:
+            cum = self._cum[m]
+            totals[m] = cum[ends] - cum[starts]
+        totals['pincodes'] = ends - starts
+        return totals
+
+    def _range(self, prefix, digits):
+        # Pincodes sharing a prefix form one contiguous block of the sorted array
+        scale = 10 ** (PINCODE_DIGITS - digits)
+        lo = np.searchsorted(self.pincodes, prefix * scale, side='left')
+        hi = np.searchsorted(self.pincodes, (prefix + 1) * scale, side='left')
+        return lo, hi
+
+    def level(self, level):
+        """Totals for every prefix at the given level."""
+        return self._levels[level].copy()
+
+    def total(self, prefix, digits=None):
+        """Totals for a single prefix, e.g. total(5) or total(560)."""
+        digits = digits or len(str(prefix))
+        lo, hi = self._range(int(prefix), digits)
+        result = {m: self._cum[m][hi] - self._cum[m][lo] for m in self.metrics}
+        result['pincodes'] = int(hi - lo)
+        return result
+
+    def children(self, prefix=None, digits=None):
+        """Totals for the next level down below a prefix (all zones when prefix is None)."""
+        if prefix is None:
+            return self.level('zone')
+
+        digits = digits or len(str(prefix))
+        level_digits = sorted(LEVELS.values())
+        child_digits = next(d for d in level_digits if d > digits)
+        child_level = next(name for name, d in LEVELS.items() if d == child_digits)
+
+        # Child prefixes of a parent are also contiguous in the sorted level table
+        table = self._levels[child_level]
+        scale = 10 ** (child_digits - digits)
+        keys = table['prefix'].to_numpy()
+        lo = np.searchsorted(keys, int(prefix) * scale, side='left')
+        hi = np.searchsorted(keys, (int(prefix) + 1) * scale, side='left')
+        return table.iloc[lo:hi].reset_index(drop=True)
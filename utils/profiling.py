@@ -0,0 +1,304 @@
+# ------------------------- #
+# 🐞 On-Demand Page Profiler
+# ------------------------- #
+# Opt-in with ?profile=1 in the page URL or PHONEPE_PROFILE=1. While a rerun
+# is profiled, a background thread samples the page's script thread every
+# few milliseconds (no tracing hooks, so overhead stays low) and named
+# sections (functions decorated with @profiled, or `with section(...)`)
+# record wall time. At the end of the rerun the samples are written as
+# folded stacks, which flamegraph.pl and speedscope read directly, and a
+# summary table is shown in a debug panel. Only the newest
+# PHONEPE_PROFILE_KEEP folded files are kept, like the result cache's size
+# limit, so profiling every rerun does not fill the disk.
+#
+# Allocation tracking is a separate opt-in (PHONEPE_PROFILE_ALLOCATIONS=1)
+# because tracemalloc is process-wide: it slows every thread of the server
+# while on, and the traced total includes allocations made by all other
+# sessions, so a section's "allocated" figure is only meaningful when one
+# rerun runs at a time. Profilers share tracing through a reference count,
+# so tracing stops when the last one finishes (and never if it was already
+# on), and the global peak is never reset.
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+PROFILE_ENV = 'PHONEPE_PROFILE'
+PROFILE_DIR_ENV = 'PHONEPE_PROFILE_DIR'
+INTERVAL_ENV = 'PHONEPE_PROFILE_INTERVAL_MS'
+ALLOCATIONS_ENV = 'PHONEPE_PROFILE_ALLOCATIONS'
+KEEP_ENV = 'PHONEPE_PROFILE_KEEP'
+DEFAULT_PROFILE_DIR = Path(__file__).resolve().parent.parent / '.cache' / 'profiles'
+DEFAULT_INTERVAL_MS = 5
+DEFAULT_KEEP = 50
+# A profile whose page never reached finish_page_profile (e.g. st.stop()) ends after this long
+MAX_PROFILE_SECONDS = 300
+
+# Libraries reported separately in the "where did the time go" table
+LIBRARIES = ('pandas', 'numpy', 'pyarrow', 'plotly', 'matplotlib', 'seaborn', 'streamlit', 'requests')
+LIBRARY_ALIASES = {'_plotly_utils': 'plotly', 'narwhals': 'plotly'}
+
+# Active profiler per script thread (each Streamlit session reruns in its own thread)
+_active = {}
+
+# tracemalloc users across all profilers; tracing is only stopped if we started it
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+def _env_flag(name):
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def _prune_profiles(directory, keep):
+    """Delete all but the `keep` newest folded-stack files in directory."""
+    files = []
+    for path in directory.glob('*.folded'):
+        try:
+            files.append((path.stat().st_mtime_ns, path))
+        except FileNotFoundError:
+            pass  # pruned by another session meanwhile
+    for _, path in sorted(files, reverse=True)[max(keep, 0):]:
+        path.unlink(missing_ok=True)
+
+
+class PageProfiler:
+    """Samples one thread's stack and records per-section time (and optionally allocations)."""
+
+    def __init__(self, page, page_file, interval_ms=None, allocations=None):
+        self.page = page
+        self.page_file = os.path.abspath(page_file)
+        if interval_ms is None:
+            interval_ms = float(os.environ.get(INTERVAL_ENV, DEFAULT_INTERVAL_MS))
+        self.interval = interval_ms / 1000
+        if allocations is None:
+            allocations = _env_flag(ALLOCATIONS_ENV)
+        self.allocations = allocations
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.libraries = Counter()
+        self.sections = {}
+        self._section_stack = []
+        self._stop_event = threading.Event()
+        self._stop_lock = threading.Lock()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f'profiler-{page}', daemon=True)
+        self.started_at = None
+        self.wall = None
+        self.output_path = None
+
+    # ------------------------- #
+    # ⏯️ Lifecycle
+    # ------------------------- #
+    def start(self):
+        if self.allocations:
+            _acquire_tracing()
+        self.started_at = time.perf_counter()
+        _active[self.thread_id] = self
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        with self._stop_lock:
+            if self.wall is not None:
+                return self
+            self._stop_event.set()
+            if self._sampler is not threading.current_thread():
+                self._sampler.join()
+            self.wall = time.perf_counter() - self.started_at
+            if _active.get(self.thread_id) is self:
+                del _active[self.thread_id]
+            if self.allocations:
+                _release_tracing()
+            self.output_path = self._write_folded()
+        return self
+
+    # ------------------------- #
+    # 📸 Sampling
+    # ------------------------- #
+    def _sample_loop(self):
+        deadline = time.perf_counter() + MAX_PROFILE_SECONDS
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or not self._record(frame) or time.perf_counter() > deadline:
+                # The page script ended without finish_page_profile (e.g. st.stop() or an exception)
+                break
+        if not self._stop_event.is_set():
+            self.stop()
+
+    def _record(self, frame):
+        """Count one sample; returns False when the page script is no longer on the stack."""
+        names, library = [], None
+        while True:
+            if frame is None:
+                return False
+            code = frame.f_code
+            if os.path.abspath(code.co_filename) == self.page_file and code.co_name == '<module>':
+                break  # everything below the page script is Streamlit's runner
+            module = frame.f_globals.get('__name__', '?')
+            if module == '__main__':
+                module = self.page
+            top = LIBRARY_ALIASES.get(module.split('.')[0], module.split('.')[0])
+            if library is None and top in LIBRARIES:
+                library = top
+            # Section wrappers add nothing to the flamegraph beyond the section name itself
+            if module != __name__:
+                names.append(f'{module}.{getattr(code, "co_qualname", code.co_name)}')
+            frame = frame.f_back
+
+        sections = [s['name'] for s in self._section_stack]
+        self.stacks[';'.join([self.page] + sections + names[::-1])] += 1
+        self.libraries[library or 'page code'] += 1
+        for name in set(sections):
+            self.sections[name]['samples'] += 1
+        return True
+
+    # ------------------------- #
+    # 🏷️ Named Sections
+    # ------------------------- #
+    @contextmanager
+    def section(self, name):
+        stats = self.sections.setdefault(name, {'calls': 0, 'wall_s': 0.0, 'samples': 0, 'alloc_bytes': 0})
+        start_mem = self._traced_memory()
+        self._section_stack.append({'name': name})
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._section_stack.pop()
+            stats['calls'] += 1
+            stats['wall_s'] += elapsed
+            stats['alloc_bytes'] += self._traced_memory() - start_mem
+
+    def _traced_memory(self):
+        # Process-wide: includes whatever other threads allocated meanwhile
+        return tracemalloc.get_traced_memory()[0] if self.allocations else 0
+
+    # ------------------------- #
+    # 📊 Results
+    # ------------------------- #
+    def _write_folded(self):
+        directory = Path(os.environ.get(PROFILE_DIR_ENV) or DEFAULT_PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.page}-{datetime.now():%Y%m%d-%H%M%S-%f}.folded"
+        path.write_text(self.folded())
+        _prune_profiles(directory, int(os.environ.get(KEEP_ENV, DEFAULT_KEEP)))
+        return path
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def section_summary(self):
+        rows = [
+            {
+                'section': name,
+                'calls': s['calls'],
+                'wall_ms': s['wall_s'] * 1000,
+                'sampled_ms': s['samples'] * self.interval * 1000,
+                'allocated_mb': s['alloc_bytes'] / 1024 / 1024,
+            }
+            for name, s in self.sections.items()
+        ]
+        columns = ['section', 'calls', 'wall_ms', 'sampled_ms']
+        if self.allocations:
+            columns.append('allocated_mb')
+        return pd.DataFrame(rows, columns=columns).sort_values(by='wall_ms', ascending=False)
+
+    def library_summary(self):
+        total = sum(self.libraries.values()) or 1
+        result = pd.DataFrame(self.libraries.most_common(), columns=['library', 'samples'])
+        result['share'] = result['samples'] / total
+        return result
+
+
+# ------------------------- #
+# 🔌 Page Hooks
+# ------------------------- #
+def section(name):
+    """Time a block as a named section of the active profile; a no-op when not profiling."""
+    profiler = _active.get(threading.get_ident())
+    return profiler.section(name) if profiler else nullcontext()
+
+
+def profiled(name=None):
+    """Decorator form of section(); the section name defaults to the function name."""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with section(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profiling_requested():
+    import streamlit as st
+
+    if _env_flag(PROFILE_ENV):
+        return True
+    return st.query_params.get('profile', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def start_page_profile(page, page_file):
+    """Start profiling this rerun if requested; returns the profiler or None."""
+    if not profiling_requested():
+        return None
+    previous = _active.get(threading.get_ident())
+    if previous is not None:
+        previous.stop()
+    return PageProfiler(page, page_file).start()
+
+
+def finish_page_profile(profiler):
+    """Stop profiling and render the debug panel."""
+    if profiler is None:
+        return
+    import streamlit as st
+
+    profiler.stop()
+    with st.expander("🐞 Profiler: Where Did This Rerun Spend Its Time?", expanded=True):
+        st.caption(
+            f"Rerun took {profiler.wall * 1000:,.0f} ms · "
+            f"{sum(profiler.stacks.values()):,} samples every {profiler.interval * 1000:g} ms · "
+            f"flamegraph: {profiler.output_path}"
+        )
+        st.write("**Named Sections**")
+        if profiler.allocations:
+            st.caption("allocated_mb is the net change in memory traced across the whole process, other sessions included")
+        st.dataframe(profiler.section_summary().round(2), use_container_width=True)
+        st.write("**Sampled Time by Library**")
+        st.dataframe(profiler.library_summary().round(3), use_container_width=True)
+        st.download_button(
+            "⬇️ Download Folded Stacks (flamegraph.pl / speedscope)",
+            profiler.folded(),
+            file_name=profiler.output_path.name
+        )
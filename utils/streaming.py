@@ -0,0 +1,198 @@
+# ------------------------- #
+# 🌊 Chunked Streaming Aggregation
+# ------------------------- #
+# Reads a CSV in bounded-size chunks and folds each chunk into a small
+# partial aggregate (one row per group), so memory is sized by the
+# configured budget and by the size of the results instead of by the size
+# of the file. In streaming mode the dataset registry does not load the
+# large CSVs at all: it hands the pages a ChunkedCsv, and every section of
+# those pages (filter options, filtered tables, sums, argmax rows, anomaly
+# scores, forecasts) is computed from chunks. Partial aggregates are
+# mergeable, and the results match the in-memory pandas path: integer sums
+# and argmax/argmin rows (including tie-breaking on the first row) are
+# identical; float sums can differ only in the last bits of rounding.
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.disk_cache import dataset_version
+
+# Streaming is opt-in: PHONEPE_STREAMING=1 switches the pages to chunked reads
+STREAMING_ENV = 'PHONEPE_STREAMING'
+BUDGET_ENV = 'PHONEPE_MEMORY_BUDGET_MB'
+DEFAULT_BUDGET_MB = 64
+
+# Rows sampled to estimate the in-memory size of one row
+SAMPLE_ROWS = 1000
+# Headroom for the groupby / concat copies made while folding a chunk
+WORKING_SET_FACTOR = 4
+
+
+def streaming_enabled():
+    return os.environ.get(STREAMING_ENV, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def memory_budget_bytes(budget_mb=None):
+    if budget_mb is None:
+        budget_mb = float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_MB))
+    return int(budget_mb * 1024 * 1024)
+
+
+def chunk_rows_for_budget(path, budget_mb=None, usecols=None, dtype=None):
+    """Number of rows per chunk that keeps one chunk's working set within the budget."""
+    sample = pd.read_csv(path, nrows=SAMPLE_ROWS, usecols=usecols, dtype=dtype)
+    if sample.empty:
+        return SAMPLE_ROWS
+    bytes_per_row = sample.memory_usage(index=True, deep=True).sum() / len(sample)
+    return max(1, int(memory_budget_bytes(budget_mb) / (bytes_per_row * WORKING_SET_FACTOR)))
+
+
+def iter_csv_chunks(path, budget_mb=None, usecols=None, chunk_rows=None, dtype=None):
+    """Yield the CSV as DataFrames of bounded size.
+
+    Chunks keep a continuous RangeIndex across the file, so row labels match
+    the ones a single pd.read_csv would produce. Dtypes are inferred per chunk,
+    so a column with gaps in only some chunks (e.g. pincode) comes back as
+    int64 in one chunk and float64 in the next; pass `dtype` to pin it to the
+    dtype the whole-file read infers.
+    """
+    if chunk_rows is None:
+        chunk_rows = chunk_rows_for_budget(path, budget_mb, usecols, dtype)
+    with pd.read_csv(path, usecols=usecols, chunksize=chunk_rows, dtype=dtype) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+# ------------------------- #
+# ➕ Mergeable Partial Aggregates
+# ------------------------- #
+def group_sum(chunks, keys, values):
+    """Streaming equivalent of df.groupby(keys)[values].sum()."""
+    keys, single = _as_list(keys), isinstance(values, str)
+    values = _as_list(values)
+    total = None
+    for chunk in chunks:
+        partial = chunk.groupby(keys, sort=False)[values].sum()
+        total = partial if total is None else pd.concat([total, partial]).groupby(level=keys, sort=False).sum()
+
+    if total is None:
+        total = pd.DataFrame(columns=keys + values).groupby(keys)[values].sum()
+    total = total.sort_index()
+    return total[values[0]] if single else total
+
+
+def group_argmax(chunks, keys, value):
+    """Streaming equivalent of df.loc[df.groupby(keys)[value].idxmax()]."""
+    return _group_arg(chunks, keys, value, 'idxmax')
+
+
+def group_argmin(chunks, keys, value):
+    """Streaming equivalent of df.loc[df.groupby(keys)[value].idxmin()]."""
+    return _group_arg(chunks, keys, value, 'idxmin')
+
+
+def _group_arg(chunks, keys, value, how):
+    keys = _as_list(keys)
+    best = None
+    for chunk in chunks:
+        candidates = _pick(chunk, keys, value, how)
+        # Earlier rows come first, so ties keep the first occurrence like pandas
+        best = candidates if best is None else _pick(pd.concat([best, candidates]), keys, value, how)
+    return best
+
+
+def _pick(df, keys, value, how):
+    idx = getattr(df.groupby(keys)[value], how)()
+    return df.loc[idx]
+
+
+# ------------------------- #
+# 📄 Chunked Stand-in for a Loaded DataFrame
+# ------------------------- #
+class SourceChangedError(RuntimeError):
+    """The file behind a ChunkedCsv no longer matches the version it was opened for."""
+
+
+class ChunkedCsv:
+    """A dataset left on disk and read in chunks on demand; used instead of its DataFrame.
+
+    Every pass checks the file's version before the first and after the last
+    chunk, so a result is never computed from (and cached under the version
+    of) data other than the one this reader stands for.
+    """
+
+    def __init__(self, path, version, dtype=None, budget_mb=None):
+        self.path = path
+        self.version = version
+        self.dtype = dtype
+        self.budget_mb = budget_mb
+
+    def __repr__(self):
+        # Identifies the data in disk-cache keys without reading the file
+        return f'ChunkedCsv({os.path.basename(self.path)!r}, {self.version!r})'
+
+    def chunks(self, usecols=None):
+        dtype = self.dtype
+        if dtype and usecols is not None:
+            dtype = {c: t for c, t in dtype.items() if c in usecols}
+        self._check_version()
+        yield from iter_csv_chunks(self.path, self.budget_mb, usecols=usecols, dtype=dtype or None)
+        self._check_version()
+
+    def _check_version(self):
+        if dataset_version(self.path) != self.version:
+            raise SourceChangedError(f"{self.path} changed after version {self.version} was loaded")
+
+    def columns(self):
+        return list(pd.read_csv(self.path, nrows=0).columns)
+
+    def head(self, n=5):
+        self._check_version()
+        return pd.read_csv(self.path, nrows=n, dtype=self.dtype)
+
+    def unique(self, column):
+        """Distinct values in order of first appearance, like Series.unique()."""
+        seen = [pd.unique(chunk[column]) for chunk in self.chunks(usecols=[column])]
+        return pd.unique(np.concatenate(seen)) if seen else np.array([])
+
+    def filter(self, **isin):
+        """Rows whose columns take one of the given values, e.g. filter(trans_year=[2019])."""
+        parts = []
+        for chunk in self.chunks():
+            mask = np.ones(len(chunk), dtype=bool)
+            for column, values in isin.items():
+                mask &= chunk[column].isin(values).to_numpy()
+            parts.append(chunk[mask])
+        return pd.concat(parts) if parts else self.head(0)
+
+    def sum(self, keys, values):
+        """Streaming df.groupby(keys)[values].sum()."""
+        return group_sum(self.chunks(usecols=_as_list(keys) + _as_list(values)), keys, values)
+
+
+# ------------------------- #
+# 🏷️ Potential Classification
+# ------------------------- #
+def classify_potential(totals, labels=('HIGH', 'POTENTIAL', 'LOW')):
+    """Label totals above the mean HIGH, below half the mean LOW, otherwise POTENTIAL."""
+    high, potential, low = labels
+    avg = totals.mean()
+    category = np.select(
+        [totals > avg, totals < avg * 0.5],
+        [high, low],
+        default=potential
+    )
+    return pd.Series(category, index=totals.index, name='category')
+
+
+def stream_potential(chunks, keys, value, labels=('HIGH', 'POTENTIAL', 'LOW')):
+    """Sum value per group in chunks, then classify the (small) per-group totals."""
+    totals = group_sum(chunks, keys, value)
+    result = totals.reset_index()
+    result['category'] = classify_potential(totals, labels).to_numpy()
+    return result.sort_values(by=value, ascending=False)
+
+
+def _as_list(cols):
+    return [cols] if isinstance(cols, str) else list(cols)